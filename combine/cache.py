@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .logger import logger
+
+
+def write_atomic(path: str, content: bytes) -> None:
+    """Other processes may be reading the cache, so never leave a partial file behind"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def touch(path: str) -> None:
+    """Mark a cache file as recently used, which is what pruning goes by"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_directory(path: str, max_size: int) -> None:
+    """Remove the least recently used files until the directory is under max_size bytes"""
+    files = []
+    total_size = 0
+
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file_path))
+            total_size += stat.st_size
+
+    if total_size <= max_size:
+        return
+
+    for _, size, file_path in sorted(files):
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue
+
+        total_size -= size
+        if total_size <= max_size:
+            break
+
+    logger.debug("Pruned %s to %s bytes", path, total_size)
+
+
+class RenderCache:
+    """
+    A content-addressed cache for rendered strings (Markdown, highlighted code, etc.).
+
+    Recently used values are kept in memory, and everything is written to disk
+    (when there is a path) so unchanged content is only rendered once across builds.
+    On disk, the least recently used values are pruned past max_size bytes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_items: int = 2048,
+        max_size: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_size = max_size
+        self._memory: Dict[str, "OrderedDict[str, str]"] = {}
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _get_path(self, namespace: str, key: str) -> str:
+        assert self.path
+        return os.path.join(self.path, namespace, key[:2], key)
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        memory = self._memory.setdefault(namespace, OrderedDict())
+
+        if key in memory:
+            memory.move_to_end(key)
+            return memory[key]
+
+        if not self.path:
+            return None
+
+        path = self._get_path(namespace, key)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+        except OSError:
+            return None
+
+        touch(path)
+        self._remember(memory, key, value)
+
+        return value
+
+    def set(self, namespace: str, key: str, value: str) -> None:
+        self._remember(self._memory.setdefault(namespace, OrderedDict()), key, value)
+
+        if not self.path:
+            return
+
+        path = self._get_path(namespace, key)
+
+        try:
+            write_atomic(path, value.encode("utf-8"))
+        except OSError as e:
+            logger.debug("Unable to write to render cache %s: %s", path, e)
+
+    def _remember(self, memory: "OrderedDict[str, str]", key: str, value: str) -> None:
+        memory[key] = value
+        memory.move_to_end(key)
+        if len(memory) > self.max_memory_items:
+            memory.popitem(last=False)
+
+    def prune(self) -> None:
+        if self.path and os.path.exists(self.path):
+            prune_directory(self.path, self.max_size)
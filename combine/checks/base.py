@@ -1,6 +1,134 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import bs4
+
 from .issues import Issues
+from .output_index import OutputIndex
 
 
 class Check:
     def run(self) -> Issues:
         raise NotImplementedError
+
+
+class HTMLCheck(Check):
+    """
+    A check that looks at the elements of an HTML document.
+
+    Instead of searching the tree on its own, it is sent the elements it's
+    interested in (`tags`, or every element if None) as part of a single walk
+    over the document, and reports its issues at the end.
+    """
+
+    tags: Optional[Set[str]] = None
+
+    # Checks that depend on the rest of the site (like links to other pages)
+    # can be finished later, after everything has been built
+    deferred = False
+
+    def __init__(self, html_soup: bs4.BeautifulSoup) -> None:
+        self.html_soup = html_soup
+
+    def start(self) -> None:
+        """Reset any state before a walk"""
+        pass
+
+    def visit(self, element: bs4.element.Tag) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> Issues:
+        raise NotImplementedError
+
+    def run(self) -> Issues:
+        walk_html(self.html_soup, [self])
+        return self.finish()
+
+    def defer(self) -> None:
+        """Called instead of finish() when the check is deferred"""
+        pass
+
+    def index_site(self, output_index: OutputIndex) -> None:
+        """Add what the deferred check knows about its page to the site index"""
+        pass
+
+    def finish_deferred(self, output_index: OutputIndex) -> Issues:
+        """Finish a deferred check, once everything has been built and indexed"""
+        return self.finish()
+
+    def __getstate__(self) -> dict:
+        # Deferred checks are sent between processes without the whole document
+        state = self.__dict__.copy()
+        state["html_soup"] = None
+        return state
+
+
+# The issues found in a file's output, and the checks left to finish at the end
+FileChecks = Tuple[Issues, List[HTMLCheck]]
+
+
+def walk_html(html_soup: bs4.BeautifulSoup, checks: Iterable[HTMLCheck]) -> None:
+    """Walk the document once, sending each element to the checks that want it"""
+    every_element: List[HTMLCheck] = []
+    by_tag: Dict[str, List[HTMLCheck]] = {}
+
+    for check in checks:
+        check.start()
+
+        if check.tags is None:
+            every_element.append(check)
+        else:
+            for tag in check.tags:
+                by_tag.setdefault(tag, []).append(check)
+
+    for element in html_soup.descendants:
+        if not isinstance(element, bs4.element.Tag):
+            continue
+
+        for check in every_element:
+            check.visit(element)
+
+        for check in by_tag.get(element.name, []):
+            check.visit(element)
+
+
+def get_style_text(element: bs4.element.Tag) -> str:
+    """The CSS in a <style> tag (.text skips it with some parsers)"""
+    return "".join(str(x) for x in element.contents)
+
+
+def run_checks(
+    checks: List[Check], deferred: Optional[List[HTMLCheck]] = None
+) -> Issues:
+    """
+    Run checks in order, walking each HTML document only once
+    for all of the checks that share it.
+
+    If a deferred list is given, deferred checks are added to it instead of
+    being finished, and the caller is responsible for finishing them.
+    """
+    issues = Issues()
+
+    html_checks: Dict[int, List[HTMLCheck]] = {}
+    soups: Dict[int, bs4.BeautifulSoup] = {}
+    for check in checks:
+        if isinstance(check, HTMLCheck):
+            html_checks.setdefault(id(check.html_soup), []).append(check)
+            soups[id(check.html_soup)] = check.html_soup
+
+    for soup_id, soup_checks in html_checks.items():
+        walk_html(soups[soup_id], soup_checks)
+
+    for check in checks:
+        if isinstance(check, HTMLCheck):
+            if check.deferred and deferred is not None:
+                check.defer()
+                deferred.append(check)
+                continue
+            check_issues = check.finish()
+        else:
+            check_issues = check.run()
+
+        for issue in check_issues:
+            issues.append(issue)
+
+    return issues
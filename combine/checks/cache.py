@@ -0,0 +1,86 @@
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from typing import Optional
+
+from ..cache import prune_directory, touch, write_atomic
+from ..logger import logger
+from .base import FileChecks
+
+
+@lru_cache(maxsize=None)
+def get_checks_version() -> str:
+    """Changes whenever Combine or any of the checks do"""
+    from .. import __version__
+
+    h = hashlib.sha256(__version__.encode("utf-8"))
+
+    checks_dir = os.path.dirname(__file__)
+    for filename in sorted(os.listdir(checks_dir)):
+        if filename.endswith(".py"):
+            with open(os.path.join(checks_dir, filename), "rb") as f:
+                h.update(f.read())
+
+    return h.hexdigest()
+
+
+class CheckCache:
+    """
+    Check results for HTML that was already checked, by its content,
+    so a page that renders the same as last time doesn't have to be parsed again.
+
+    Deferred checks (broken links) are stored unfinished
+    and are still finished against the current output.
+    The least recently used results are pruned past max_size bytes.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, max_size: int = 256 * 1024 * 1024
+    ) -> None:
+        self.path = path
+        self.max_size = max_size
+
+    def key(self, html: str, html_parser: str, output_path: str) -> str:
+        h = hashlib.sha256()
+        # Links are resolved relative to the output path
+        for part in (get_checks_version(), html_parser, output_path, html):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        assert self.path
+        return os.path.join(self.path, key[:2], key)
+
+    def get(self, key: str) -> Optional[FileChecks]:
+        if not self.path:
+            return None
+
+        path = self._get_path(key)
+
+        try:
+            with open(path, "rb") as f:
+                checks = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug("Unable to read check cache %s: %s", key, e)
+            return None
+
+        touch(path)
+
+        return checks
+
+    def set(self, key: str, checks: FileChecks) -> None:
+        if not self.path:
+            return
+
+        try:
+            write_atomic(self._get_path(key), pickle.dumps(checks))
+        except OSError as e:
+            logger.debug("Unable to write to check cache %s: %s", key, e)
+
+    def prune(self) -> None:
+        if self.path and os.path.exists(self.path):
+            prune_directory(self.path, self.max_size)
@@ -1,29 +1,31 @@
-from typing import Dict, List
-from .base import Check
+from typing import Dict, List, Set
+from .base import HTMLCheck
 from .issues import Issues, Issue
 import bs4
 
 
-class DuplicateIDCheck(Check):
-    def __init__(self, html_soup: bs4.BeautifulSoup) -> None:
-        self.html_soup = html_soup
+class DuplicateIDCheck(HTMLCheck):
+    def start(self) -> None:
+        self.ids_seen: Dict[str, List[bs4.element.Tag]] = {}
 
-    def run(self) -> Issues:
-        issues = Issues()
+    def visit(self, element: bs4.element.Tag) -> None:
+        id = element.get("id")
+        if not id:
+            return
 
-        ids_seen: Dict[str, List[bs4.element.Tag]] = {}
+        if id in self.ids_seen:
+            self.ids_seen[id].append(element)
+        else:
+            self.ids_seen[id] = [element]
 
-        for el in self.html_soup.findAll():
-            id = el.get("id")
-            if not id:
-                continue
+    @property
+    def ids(self) -> Set[str]:
+        return set(self.ids_seen.keys())
 
-            if id in ids_seen:
-                ids_seen[id].append(el)
-            else:
-                ids_seen[id] = [el]
+    def finish(self) -> Issues:
+        issues = Issues()
 
-        for id, elements in ids_seen.items():
+        for id, elements in self.ids_seen.items():
             if len(elements) > 1:
                 issues.append(
                     Issue(
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+import ssl
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote, urljoin, urlsplit
+
+import bs4
+
+from ..cache import write_atomic
+from ..logger import logger
+from .base import HTMLCheck
+from .issues import Issues, Issue
+from .output_index import OutputIndex
+
+
+MAX_REDIRECTS = 5
+
+# Left as-is when encoding a path (including anything already percent-encoded)
+URL_SAFE_CHARACTERS = "/%:@!$&'()*+,;=?~-._"
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class ExternalLinkCheck(HTMLCheck):
+    """
+    Collects the external links on a page (including og:url and og:image).
+    They're checked once for the whole site (if enabled), and then reported per page.
+    """
+
+    types = {
+        "img": "src",
+        "script": "src",
+        "a": "href",
+        "link": "href",
+        "iframe": "src",
+        "meta": "content",
+    }
+    tags = set(types.keys())
+
+    deferred = True
+
+    def start(self) -> None:
+        self.links: List[Tuple[str, str]] = []
+
+    def visit(self, node: bs4.element.Tag) -> None:
+        if node.name == "meta" and node.get("property") not in ("og:url", "og:image"):
+            return
+
+        value = (node.get(self.types[node.name]) or "").strip()
+
+        if value.startswith("//"):
+            value = "https:" + value
+
+        if not value.startswith(("http://", "https://")):
+            return
+
+        # Fragments aren't sent to the server
+        self.links.append((str(node), value.split("#")[0]))
+
+    def finish(self) -> Issues:
+        # External links are only checked for the whole site
+        return Issues()
+
+    def index_site(self, output_index: OutputIndex) -> None:
+        output_index.external_links.update(url for _, url in self.links)
+
+    def finish_deferred(self, output_index: OutputIndex) -> Issues:
+        issues = Issues()
+
+        for element, url in self.links:
+            error = output_index.external_link_errors.get(url)
+            if error:
+                issues.append(
+                    Issue(
+                        type="external-link-broken",
+                        description="You have a link to another site that doesn't work.",
+                        context={"element": element, "url": url, "error": error},
+                    )
+                )
+
+        return issues
+
+
+class ExternalLinkChecker:
+    """
+    Checks external URLs concurrently with asyncio, reusing keep-alive connections
+    and limiting the number of requests to each host at a time.
+
+    URLs that worked are cached on disk (for ttl seconds), so repeated builds
+    only make requests for new links or ones that were broken.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        ttl: int = 86400,
+        per_host: int = 4,
+        max_connections: int = 32,
+        timeout: float = 10,
+    ) -> None:
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+        # URLs that got a 429 during the current check
+        self._rate_limited: Set[str] = set()
+
+    def check(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Get the error for each URL (or None if it works)"""
+        urls = set(urls)
+        self._rate_limited = set()
+        checked_at = self.load_cache()
+        now = time.time()
+
+        results: Dict[str, Optional[str]] = {
+            url: None for url in urls if now - checked_at.get(url, 0) < self.ttl
+        }
+
+        to_check = sorted(urls - set(results))
+        if to_check:
+            logger.debug("Checking %s external links", len(to_check))
+            results.update(asyncio.run(self.check_urls(to_check)))
+
+        for url in to_check:
+            # Rate limited links seemed fine, but weren't actually checked
+            if results[url] is None and url not in self._rate_limited:
+                checked_at[url] = now
+
+        self.save_cache({url: t for url, t in checked_at.items() if now - t < self.ttl})
+
+        return results
+
+    def load_cache(self) -> Dict[str, float]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def save_cache(self, checked_at: Dict[str, float]) -> None:
+        if self.cache_path:
+            write_atomic(
+                self.cache_path, json.dumps(checked_at, sort_keys=True).encode()
+            )
+
+    async def check_urls(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        self._pool: Dict[Tuple[str, str, int], List[Connection]] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._connection_limit = asyncio.Semaphore(self.max_connections)
+        self._ssl_context = ssl.create_default_context()
+
+        try:
+            errors = await asyncio.gather(*[self.check_url(url) for url in urls])
+        finally:
+            for connections in self._pool.values():
+                for _, writer in connections:
+                    writer.close()
+
+        return dict(zip(urls, errors))
+
+    async def check_url(self, url: str) -> Optional[str]:
+        original_url = url
+
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, location = await self.request("HEAD", url)
+
+                if status in (405, 501):
+                    # HEAD isn't supported everywhere
+                    status, location = await self.request("GET", url)
+
+                if 300 <= status < 400 and location:
+                    url = urljoin(url, location)
+                    continue
+
+                if status == 429:
+                    # Being rate limited doesn't mean the link is broken
+                    self._rate_limited.add(original_url)
+                    return None
+
+                if status >= 400:
+                    return f"HTTP {status}"
+
+                return None
+
+            return "Too many redirects"
+        except EOFError:
+            # (Including asyncio.IncompleteReadError)
+            return "Connection closed without a response"
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            return str(e) or e.__class__.__name__
+
+    async def request(self, method: str, url: str) -> Tuple[int, Optional[str]]:
+        parsed = urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+
+        host = parsed.hostname.encode("idna").decode("ascii")
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        key = (parsed.scheme, host, port)
+        netloc = f"[{host}]" if ":" in host else host
+        if parsed.port:
+            netloc += f":{parsed.port}"
+
+        # Links can have characters that have to be encoded (spaces, non-ASCII, etc.)
+        path = quote(parsed.path or "/", safe=URL_SAFE_CHARACTERS)
+        if parsed.query:
+            path += "?" + quote(parsed.query, safe=URL_SAFE_CHARACTERS)
+
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+
+        async with self._host_limits[host], self._connection_limit:
+            idle = self._pool.setdefault(key, [])
+            # Only HEAD responses (no body) leave the connection ready for reuse
+            keep_alive = method == "HEAD"
+
+            if idle:
+                connection = idle.pop()
+                try:
+                    status, headers = await self.send(
+                        connection, method, netloc, path, keep_alive
+                    )
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    # The server closed the idle connection, so start a new one
+                    connection[1].close()
+                    connection = await self.connect(parsed.scheme, host, port)
+                    status, headers = await self.send(
+                        connection, method, netloc, path, keep_alive
+                    )
+            else:
+                connection = await self.connect(parsed.scheme, host, port)
+                status, headers = await self.send(
+                    connection, method, netloc, path, keep_alive
+                )
+
+            if keep_alive and headers.get("connection", "").lower() != "close":
+                idle.append(connection)
+            else:
+                connection[1].close()
+
+        return status, headers.get("location")
+
+    async def connect(self, scheme: str, host: str, port: int) -> Connection:
+        return await asyncio.wait_for(
+            asyncio.open_connection(
+                host,
+                port,
+                ssl=self._ssl_context if scheme == "https" else None,
+            ),
+            timeout=self.timeout,
+        )
+
+    async def send(
+        self,
+        connection: Connection,
+        method: str,
+        netloc: str,
+        path: str,
+        keep_alive: bool,
+    ) -> Tuple[int, Dict[str, str]]:
+        reader, writer = connection
+
+        writer.write(
+            (
+                f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {netloc}\r\n"
+                "User-Agent: combine\r\n"
+                "Accept: */*\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                "\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+
+        status_line = await asyncio.wait_for(reader.readline(), timeout=self.timeout)
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise ValueError(f"Invalid response: {status_line!r}")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout=self.timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if parts[0] == "HTTP/1.0" and headers.get("connection", "").lower() != (
+            "keep-alive"
+        ):
+            headers["connection"] = "close"
+
+        return int(parts[1]), headers
+
+
+def get_external_link_checker(settings: dict, cache_path: str) -> ExternalLinkChecker:
+    return ExternalLinkChecker(
+        cache_path=os.path.join(cache_path, "external_links.json"),
+        ttl=int(settings.get("cache_ttl", 86400)),
+        per_host=int(settings.get("per_host", 4)),
+        timeout=float(settings.get("timeout", 10)),
+    )
@@ -1,93 +1,184 @@
 import bs4
 import os
-from urllib.parse import urljoin
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urljoin
 
-from .base import Check
+from .base import HTMLCheck
+from .duplicate_id import DuplicateIDCheck
+from .output_index import OutputIndex
 from .issues import Issues, Issue
 
 
-class InternalLinkBrokenCheck(Check):
+class InternalLinkBrokenCheck(HTMLCheck):
+    types = {
+        "img": "src",
+        "script": "src",
+        "a": "href",
+        "link": "href",
+    }
+    tags = set(types.keys())
+
+    skip_prefixes = (
+        "//",
+        "http:",
+        "https:",
+        "tel:",
+        "sms:",
+        "mailto:",
+        "ftp:",
+        "file:",
+        "#",
+    )
+
+    # Whether a link works depends on the rest of the site being built
+    deferred = True
+
     def __init__(
-        self, html_soup: bs4.BeautifulSoup, file_path: str, output_dir: str
+        self,
+        html_soup: bs4.BeautifulSoup,
+        file_path: str,
+        output_dir: str,
+        ids_check: Optional[DuplicateIDCheck] = None,
     ) -> None:
-        self.html_soup = html_soup
+        super().__init__(html_soup)
         self.file_path = file_path
         self.output_dir = output_dir
+        # The ids on this page are already collected by the duplicate id check
+        self.ids_check = ids_check
 
-    def run(self) -> Issues:
-        issues = Issues()
-
-        types = {
-            "img": "src",
-            "script": "src",
-            "a": "href",
-            "link": "href",
+    def start(self) -> None:
+        # Links are reported by tag type, then in document order
+        self.links_by_tag: Dict[str, List[Tuple[str, str, str]]] = {
+            tag: [] for tag in self.types
         }
+        # Legacy <a name=""> anchors work as fragments too
+        self.page_ids: Set[str] = set()
 
-        skip_prefixes = (
-            "//",
-            "http:",
-            "https:",
-            "tel:",
-            "sms:",
-            "mailto:",
-            "ftp:",
-            "file:",
-            "#",
-        )
-
-        for nodeType, nodeAttribute in types.items():
-            for node in self.html_soup.findAll(nodeType):
-                value = node.get(nodeAttribute)
-
-                if value:
-                    # Remove whitespace on both ends
-                    value = value.strip()
-
-                if value and "?" in value:
-                    # Remove query params too (style.css?v=1.0)
-                    value = value.split("?")[0]
-
-                if not value:
-                    # Skip empty ones for now, not our responsibility
-                    continue
+    def visit(self, node: bs4.element.Tag) -> None:
+        if node.name == "a" and node.get("name"):
+            self.page_ids.add(node["name"])
 
-                should_skip = False
+        value = node.get(self.types[node.name])
 
-                for p in skip_prefixes:
-                    if value.startswith(p):
-                        should_skip = True
-                        break
+        if value:
+            # Remove whitespace on both ends
+            value = value.strip()
 
-                if should_skip:
-                    continue
+        if value and "#" in value:
+            value, fragment = value.split("#", 1)
+            fragment = unquote(fragment)
+        else:
+            fragment = ""
 
-                if value.startswith("/"):
-                    # remove the leading / and join to output_dir
-                    output_path = urljoin(self.output_dir, value[1:])
-                else:
-                    output_path = urljoin(self.file_path, value)
+        if value and "?" in value:
+            # Remove query params too (style.css?v=1.0)
+            value = value.split("?")[0]
+
+        if not value:
+            if fragment:
+                # A link to somewhere on this page
+                self.links_by_tag[node.name].append((str(node), "", fragment))
+
+            # Skip empty ones for now, not our responsibility
+            return
+
+        if value.startswith(self.skip_prefixes):
+            return
 
-                _, ext = os.path.splitext(output_path)
-                if not ext:
-                    # If it's a directory, pretend we're a webserver and
-                    # look for index.html
-                    if not output_path.endswith("/"):
-                        output_path += "/"
-                    output_path = urljoin(output_path, "index.html")
+        if value.startswith("/"):
+            # remove the leading / and join to output_dir
+            output_path = resolve_link(self.output_dir, value[1:])
+        else:
+            output_path = resolve_link(self.file_path, value)
 
-                # TODO if not in output_dir, that's an error ("../../../ that takes you out of combine")
+        # TODO if not in output_dir, that's an error ("../../../ that takes you out of combine")
+
+        self.links_by_tag[node.name].append((str(node), output_path, fragment))
+
+    def get_page_ids(self) -> Set[str]:
+        if self.ids_check:
+            return self.page_ids | self.ids_check.ids
+        return self.page_ids
+
+    def finish(self) -> Issues:
+        # Without the rest of the site, fragments can only be checked on this page
+        return self.get_issues(os.path.exists, lambda path: None)
+
+    def defer(self) -> None:
+        # Keep the ids, not the other check (or its elements)
+        self.page_ids = self.get_page_ids()
+        self.ids_check = None
+
+    def index_site(self, output_index: OutputIndex) -> None:
+        output_index.add_ids(self.file_path, self.get_page_ids())
+
+    def finish_deferred(self, output_index: OutputIndex) -> Issues:
+        return self.get_issues(output_index.exists, output_index.get_ids)
+
+    def get_issues(
+        self,
+        exists: Callable[[str], bool],
+        get_ids: Callable[[str], Optional[Set[str]]],
+    ) -> Issues:
+        issues = Issues()
 
-                if not os.path.exists(output_path):
+        for links in self.links_by_tag.values():
+            for element, output_path, fragment in links:
+                if output_path and not exists(output_path):
                     issues.append(
                         Issue(
                             type="internal-link-broken",
                             description="You have a link that doesn't point to an existing file.",
                             context={
-                                "element": str(node),
+                                "element": element,
                                 "target_path": os.path.relpath(output_path),
                             },
                         )
                     )
+                    continue
+
+                if not fragment or fragment.lower() == "top":
+                    # Browsers go to the top of the page for these
+                    continue
+
+                if output_path:
+                    target_ids = get_ids(output_path)
+                else:
+                    target_ids = self.get_page_ids()
+
+                if target_ids is not None and fragment not in target_ids:
+                    issues.append(
+                        Issue(
+                            type="internal-link-fragment-broken",
+                            description="You have a link to an id that doesn't exist on the page.",
+                            context={
+                                "element": element,
+                                "fragment": fragment,
+                                "target_path": os.path.relpath(
+                                    output_path or self.file_path
+                                ),
+                            },
+                        )
+                    )
 
         return issues
+
+
+@lru_cache(maxsize=10_000)
+def resolve_link(base_path: str, value: str) -> str:
+    """
+    Get the output file for a link (relative to base_path).
+    The same links show up on most pages (headers, footers, etc.), so these are memoized.
+    """
+    output_path = urljoin(base_path, value)
+
+    _, ext = os.path.splitext(output_path)
+    if not ext:
+        # If it's a directory, pretend we're a webserver and
+        # look for index.html
+        if not output_path.endswith("/"):
+            output_path += "/"
+        output_path = urljoin(output_path, "index.html")
+
+    return output_path
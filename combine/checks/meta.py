@@ -1,16 +1,24 @@
+from typing import Optional
+
 import bs4
-from .base import Check
+from .base import HTMLCheck
 from .issues import Issues, Issue
 
 
-class MetaDescriptionCheck(Check):
-    def __init__(self, html_soup: bs4.BeautifulSoup) -> None:
-        self.html_soup = html_soup
+class MetaDescriptionCheck(HTMLCheck):
+    tags = {"meta"}
+
+    def start(self) -> None:
+        self.meta: Optional[bs4.element.Tag] = None
+
+    def visit(self, element: bs4.element.Tag) -> None:
+        if not self.meta and element.get("name") == "description":
+            self.meta = element
 
-    def run(self) -> Issues:
+    def finish(self) -> Issues:
         issues = Issues()
 
-        meta = self.html_soup.find("meta", {"name": "description"})
+        meta = self.meta
         if not meta:
             # missing meta is fine for google, except for social if no og:description (checked elsewhere)
             return issues
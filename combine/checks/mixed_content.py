@@ -1,44 +1,53 @@
+from typing import Dict, List
+
 import bs4
 
-from .base import Check
+from .base import HTMLCheck
 from .issues import Issues, Issue
 
 
-class MixedContentCheck(Check):
-    def __init__(self, html_soup: bs4.BeautifulSoup) -> None:
-        self.html_soup = html_soup
-
-    def run(self) -> Issues:
+class MixedContentCheck(HTMLCheck):
+    to_check = {
+        "img": {"attr": "src"},
+        "link": {"attr": "href", "ignore": {"rel": "profile"}},
+        "iframe": {"attr": "src"},
+        # TODO missing script? but src needs to be optional (could be inline)
+    }
+    tags = set(to_check.keys())
+
+    def start(self) -> None:
+        # Issues are reported by tag type, then in document order
+        self.issues_by_tag: Dict[str, List[Issue]] = {tag: [] for tag in self.to_check}
+
+    def visit(self, el: bs4.element.Tag) -> None:
+        cfg = self.to_check[el.name]
+
+        if any(
+            [
+                el.get(k, [None])[0] == v
+                for k, v in cfg.get("ignore", {}).items()  # type: ignore
+            ]
+        ):
+            return
+
+        attr = cfg["attr"]  # type: ignore
+
+        value = el.get(attr)
+
+        if value.startswith("http:"):
+            self.issues_by_tag[el.name].append(
+                Issue(
+                    type="https-mixed-content",
+                    description="Any linked resources (CSS, img, iframes) should be linked via HTTPS.",
+                    context={"element": str(el)},
+                )
+            )
+
+    def finish(self) -> Issues:
         issues = Issues()
 
-        to_check = {
-            "img": {"attr": "src"},
-            "link": {"attr": "href", "ignore": {"rel": "profile"}},
-            "iframe": {"attr": "src"},
-            # TODO missing script? but src needs to be optional (could be inline)
-        }
-
-        for tag, cfg in to_check.items():
-            for el in self.html_soup.findAll(tag):
-                if any(
-                    [
-                        el.get(k, [None])[0] == v
-                        for k, v in cfg.get("ignore", {}).items()  # type: ignore
-                    ]
-                ):
-                    continue
-
-                attr = cfg["attr"]  # type: ignore
-
-                value = el.get(attr)
-
-                if value.startswith("http:"):
-                    issues.append(
-                        Issue(
-                            type="https-mixed-content",
-                            description="Any linked resources (CSS, img, iframes) should be linked via HTTPS.",
-                            context={"element": str(el)},
-                        )
-                    )
+        for tag_issues in self.issues_by_tag.values():
+            for issue in tag_issues:
+                issues.append(issue)
 
         return issues
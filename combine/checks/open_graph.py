@@ -1,7 +1,8 @@
 import bs4
+from typing import Optional
 from urllib.parse import urlparse
 
-from .base import Check
+from .base import HTMLCheck
 from .issues import Issues, Issue
 
 
@@ -24,16 +25,21 @@ def url_is_valid_absolute(url: str) -> bool:
     return True
 
 
-class BaseOpenGraphCheck(Check):
+class BaseOpenGraphCheck(HTMLCheck):
     og_property = ""
+    tags = {"meta"}
 
-    def __init__(self, html_soup: bs4.BeautifulSoup) -> None:
-        self.html_soup = html_soup
+    def start(self) -> None:
+        self.meta: Optional[bs4.element.Tag] = None
 
-    def run(self) -> Issues:
+    def visit(self, element: bs4.element.Tag) -> None:
+        if not self.meta and element.get("property") == f"og:{self.og_property}":
+            self.meta = element
+
+    def finish(self) -> Issues:
         issues = Issues()
 
-        meta = self.html_soup.find("meta", {"property": f"og:{self.og_property}"})
+        meta = self.meta
         self.meta_tag_content = meta.get("content", "") if meta else ""
         if not self.meta_tag_content:
             property_slug = self.og_property.replace("_", "-")
@@ -54,9 +60,18 @@ class OpenGraphTitleCheck(BaseOpenGraphCheck):
 class OpenGraphDescriptionCheck(BaseOpenGraphCheck):
     og_property = "description"
 
-    def run(self) -> Issues:
-        issues = super().run()
-        meta = self.html_soup.find("meta", {"name": "description"})
+    def start(self) -> None:
+        super().start()
+        self.meta_description: Optional[bs4.element.Tag] = None
+
+    def visit(self, element: bs4.element.Tag) -> None:
+        super().visit(element)
+        if not self.meta_description and element.get("name") == "description":
+            self.meta_description = element
+
+    def finish(self) -> Issues:
+        issues = super().finish()
+        meta = self.meta_description
         if meta and meta.get("content", ""):
             # if there is a meta description, that is a fine alternative
             # to the more specific og:description
@@ -71,8 +86,8 @@ class OpenGraphTypeCheck(BaseOpenGraphCheck):
 class OpenGraphURLCheck(BaseOpenGraphCheck):
     og_property = "url"
 
-    def run(self) -> Issues:
-        issues = super().run()
+    def finish(self) -> Issues:
+        issues = super().finish()
 
         url = self.meta_tag_content
 
@@ -106,8 +121,8 @@ class OpenGraphURLCheck(BaseOpenGraphCheck):
 class OpenGraphImageCheck(BaseOpenGraphCheck):
     og_property = "image"
 
-    def run(self) -> Issues:
-        issues = super().run()
+    def finish(self) -> Issues:
+        issues = super().finish()
 
         url = self.meta_tag_content
 
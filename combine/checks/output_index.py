@@ -0,0 +1,118 @@
+import os
+import re
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+from urllib.parse import urljoin
+
+if TYPE_CHECKING:
+    from .page_weight import PageWeightBudgets
+
+
+# Files loaded by a stylesheet
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)""")
+FONT_EXTENSIONS = (".woff2", ".woff", ".ttf", ".otf", ".eot")
+
+
+class OutputIndex:
+    """
+    Every file in the output directory, listed once per build
+    so links can be checked without a stat call for each one,
+    and the ids on each page that was checked (for #fragment links).
+
+    External links from every page are collected here too, so each URL
+    is only requested once (and the results are shared by every page).
+    File sizes (and stylesheets) are also kept, since most pages load the same assets.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        page_weight_budgets: Optional["PageWeightBudgets"] = None,
+    ) -> None:
+        self.output_dir = os.path.abspath(output_dir)
+        self._paths: Set[str] = set()
+        self._exists: Dict[str, bool] = {}
+        self._ids: Dict[str, Set[str]] = {}
+        self.external_links: Set[str] = set()
+        self.external_link_errors: Dict[str, Optional[str]] = {}
+        self.page_weight_budgets = page_weight_budgets
+        self._sizes: Dict[str, Optional[int]] = {}
+        self._stylesheets: Dict[str, str] = {}
+        self._stylesheet_fonts: Dict[str, List[str]] = {}
+
+        for root, _, filenames in os.walk(self.output_dir, followlinks=True):
+            for filename in filenames:
+                self._paths.add(os.path.join(root, filename))
+
+    def exists(self, path: str) -> bool:
+        if path not in self._exists:
+            normalized = os.path.normpath(path)
+
+            # Only misses go to the filesystem (things outside of the output,
+            # case-insensitive filesystems, etc.) and those should be rare
+            self._exists[path] = normalized in self._paths or os.path.exists(normalized)
+
+        return self._exists[path]
+
+    def add_ids(self, path: str, ids: Iterable[str]) -> None:
+        self._ids.setdefault(os.path.normpath(path), set()).update(ids)
+
+    def get_ids(self, path: str) -> Optional[Set[str]]:
+        """The ids on a page, or None if it wasn't checked in this build"""
+        return self._ids.get(os.path.normpath(path))
+
+    def get_size(self, path: str) -> Optional[int]:
+        if path not in self._sizes:
+            self._sizes[path] = get_size(path)
+
+        return self._sizes[path]
+
+    def get_stylesheet(self, path: str) -> str:
+        if path not in self._stylesheets:
+            self._stylesheets[path] = read_stylesheet(path)
+
+        return self._stylesheets[path]
+
+    def get_stylesheet_fonts(self, path: str) -> List[str]:
+        if path not in self._stylesheet_fonts:
+            self._stylesheet_fonts[path] = find_stylesheet_fonts(
+                path, self.get_stylesheet(path), self.output_dir
+            )
+
+        return self._stylesheet_fonts[path]
+
+
+def get_size(path: str) -> Optional[int]:
+    """The size of a file, or None if it doesn't exist"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def read_stylesheet(path: str) -> str:
+    """The contents of a stylesheet, or an empty string if it doesn't exist"""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def find_stylesheet_fonts(path: str, css: str, output_dir: str) -> List[str]:
+    """The paths of the (same-site) fonts loaded by a stylesheet"""
+    fonts = []
+
+    for url in CSS_URL_RE.findall(css):
+        url = url.split("#")[0].split("?")[0]
+
+        if not url.lower().endswith(FONT_EXTENSIONS) or url.startswith(
+            ("//", "http:", "https:", "data:")
+        ):
+            continue
+
+        if url.startswith("/"):
+            fonts.append(os.path.join(output_dir, url[1:]))
+        else:
+            fonts.append(urljoin(path, url))
+
+    return fonts
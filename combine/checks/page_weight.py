@@ -0,0 +1,258 @@
+import os
+import re
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+import bs4
+
+from .base import HTMLCheck, get_style_text
+from .file_size import sizeof_fmt
+from .issues import Issues, Issue
+from .links import resolve_link
+from .output_index import OutputIndex, find_stylesheet_fonts, get_size, read_stylesheet
+
+
+DEFAULT_BUDGETS: Dict[str, Optional[int]] = {
+    "total": 2_000_000,  # 2 MB
+    "inline_svg": 50_000,  # 50 KB
+    "inline_style": 50_000,  # 50 KB
+    "data_uri": 10_000,  # 10 KB
+}
+
+SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "BYTES": 1,
+    "KB": 1000,
+    "MB": 1000**2,
+    "GB": 1000**3,
+}
+
+# Enough of an inline element to find it again
+ELEMENT_CONTEXT_LENGTH = 100
+
+
+def parse_size(value: Union[str, int, float, None]) -> Optional[int]:
+    """Parse a size from combine.yml (1000, "500KB", "1.5 MB", etc.)"""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else int(value)
+
+    match = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]*)\s*", str(value))
+    if not match or match.group(2).upper() not in SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value!r} (use bytes, KB, MB or GB)")
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+class PageWeightBudgets:
+    """
+    Budgets for the pages matching each glob in combine.yml.
+    Later globs that match a page override the budgets of earlier ones.
+
+        page_weight:
+          "*":
+            total: 1MB
+          "blog/*":
+            total: 2MB
+            inline_svg: 20KB
+    """
+
+    def __init__(self, settings: Optional[dict] = None) -> None:
+        self.globs: List[Tuple[str, Dict[str, Optional[int]]]] = []
+
+        settings = settings or {}
+        if not isinstance(settings, dict):
+            raise ValueError("page_weight must be a mapping of globs to budgets")
+
+        for pattern, budgets in settings.items():
+            if not isinstance(budgets, dict):
+                raise ValueError(
+                    f"page_weight budgets for {pattern} must be a mapping of names to sizes"
+                )
+
+            unknown = set(budgets) - set(DEFAULT_BUDGETS)
+            if unknown:
+                raise ValueError(
+                    f"Unknown page_weight budget for {pattern}: {', '.join(sorted(unknown))}"
+                )
+
+            self.globs.append(
+                (pattern, {name: parse_size(size) for name, size in budgets.items()})
+            )
+
+        self._budgets: Dict[str, Dict[str, Optional[int]]] = {}
+
+    def get_budgets(self, output_relative_path: str) -> Dict[str, Optional[int]]:
+        path = output_relative_path.replace(os.sep, "/")
+
+        if path not in self._budgets:
+            budgets = DEFAULT_BUDGETS.copy()
+            for pattern, pattern_budgets in self.globs:
+                if fnmatch(path, pattern):
+                    budgets.update(pattern_budgets)
+            self._budgets[path] = budgets
+
+        return self._budgets[path]
+
+
+class PageWeightCheck(HTMLCheck):
+    """
+    Add up the size of the page and the same-site CSS, JS, images and fonts it loads,
+    and point out inline content (<svg>, <style>, data: URIs) that's too big.
+    """
+
+    types = {
+        "img": "src",
+        "script": "src",
+        "link": "href",
+        "source": "src",
+        "video": "poster",
+        "input": "src",
+        "iframe": "src",
+        "embed": "src",
+        "object": "data",
+    }
+    tags = set(types.keys()) | {"svg", "style"}
+
+    # The <link> tags that are loaded with the page
+    link_rels = {"stylesheet", "preload", "modulepreload", "icon"}
+
+    skip_prefixes = ("//", "http:", "https:", "data:", "blob:", "#")
+
+    # The assets might not be built yet
+    deferred = True
+
+    def __init__(
+        self, html_soup: bs4.BeautifulSoup, file_path: str, output_dir: str
+    ) -> None:
+        super().__init__(html_soup)
+        self.file_path = file_path
+        self.output_dir = output_dir
+
+    def start(self) -> None:
+        self.asset_paths: List[str] = []
+        self.stylesheet_paths: List[str] = []
+        # (budget, element, size) in document order
+        self.inline: List[Tuple[str, str, int]] = []
+
+    def visit(self, node: bs4.element.Tag) -> None:
+        if node.name == "svg":
+            if not node.find_parent("svg"):
+                self.add_inline("inline_svg", node, len(str(node).encode("utf-8")))
+            return
+
+        if node.name == "style":
+            self.add_inline(
+                "inline_style", node, len(get_style_text(node).encode("utf-8"))
+            )
+            return
+
+        value = (node.get(self.types[node.name]) or "").strip()
+        if not value:
+            return
+
+        if value.startswith("data:"):
+            self.add_inline("data_uri", node, len(value.encode("utf-8")))
+            return
+
+        if node.name == "link":
+            rels = set(node.get("rel") or [])
+            if not rels & self.link_rels:
+                # Canonical, alternate, etc. aren't loaded with the page
+                return
+
+        if value.startswith(self.skip_prefixes):
+            return
+
+        value = value.split("#")[0].split("?")[0]
+        if not value:
+            return
+
+        if value.startswith("/"):
+            output_path = resolve_link(self.output_dir, value[1:])
+        else:
+            output_path = resolve_link(self.file_path, value)
+
+        self.asset_paths.append(output_path)
+
+        if node.name == "link" and "stylesheet" in (node.get("rel") or []):
+            self.stylesheet_paths.append(output_path)
+
+    def add_inline(self, budget: str, node: bs4.element.Tag, size: int) -> None:
+        element = str(node)
+        if len(element) > ELEMENT_CONTEXT_LENGTH:
+            element = element[:ELEMENT_CONTEXT_LENGTH] + "..."
+        self.inline.append((budget, element, size))
+
+    def finish(self) -> Issues:
+        return self.get_issues(
+            PageWeightBudgets(),
+            get_size,
+            lambda path: find_stylesheet_fonts(
+                path, read_stylesheet(path), self.output_dir
+            ),
+        )
+
+    def finish_deferred(self, output_index: OutputIndex) -> Issues:
+        return self.get_issues(
+            output_index.page_weight_budgets or PageWeightBudgets(),
+            output_index.get_size,
+            output_index.get_stylesheet_fonts,
+        )
+
+    def get_issues(
+        self,
+        budgets: PageWeightBudgets,
+        get_size: Callable[[str], Optional[int]],
+        get_stylesheet_fonts: Callable[[str], List[str]],
+    ) -> Issues:
+        issues = Issues()
+
+        page_budgets = budgets.get_budgets(
+            os.path.relpath(self.file_path, self.output_dir)
+        )
+
+        for budget, element, size in self.inline:
+            max_size = page_budgets[budget]
+            if max_size is not None and size > max_size:
+                issues.append(
+                    Issue(
+                        type="inline-content-too-large",
+                        description="Large inline content can't be cached separately, and slows down every page it's on.",
+                        context={
+                            "element": element,
+                            "size": sizeof_fmt(size),
+                            "budget": sizeof_fmt(max_size),
+                        },
+                    )
+                )
+
+        max_total = page_budgets["total"]
+        if max_total is None:
+            return issues
+
+        paths: Set[str] = set()
+        for path in self.asset_paths:
+            paths.add(path)
+        for path in self.stylesheet_paths:
+            paths.update(get_stylesheet_fonts(path))
+
+        # Missing assets are reported by the link check
+        total = get_size(self.file_path) or 0
+        for path in paths:
+            total += get_size(path) or 0
+
+        if total > max_total:
+            issues.append(
+                Issue(
+                    type="page-weight-too-large",
+                    description="The page and the files it loads from your site add up to more than the budget.",
+                    context={
+                        "output_path": os.path.relpath(self.file_path),
+                        "page_weight": sizeof_fmt(total),
+                        "budget": sizeof_fmt(max_total),
+                    },
+                )
+            )
+
+        return issues
@@ -0,0 +1,29 @@
+from typing import List
+
+from bs4.builder import builder_registry
+
+
+# In order of preference (fastest first)
+HTML_PARSERS = ["lxml", "html.parser", "html5lib"]
+
+
+def get_installed_html_parsers() -> List[str]:
+    return [x for x in HTML_PARSERS if builder_registry.lookup(x)]
+
+
+def get_html_parser(name: str = "auto") -> str:
+    """Get the BeautifulSoup parser to use for checks, picking the fastest one if "auto" """
+    installed = get_installed_html_parsers()
+
+    if name == "auto":
+        return installed[0]
+
+    if name not in HTML_PARSERS:
+        raise ValueError(
+            f'Unknown html_parser "{name}" (must be auto, {", ".join(HTML_PARSERS)})'
+        )
+
+    if name not in installed:
+        raise ValueError(f'The "{name}" html_parser is not installed')
+
+    return name
@@ -0,0 +1,214 @@
+import os
+import re
+from typing import Callable, List, Optional, Tuple
+
+import bs4
+
+from .base import HTMLCheck, get_style_text
+from .issues import Issues, Issue
+from .links import resolve_link
+from .output_index import OutputIndex, read_stylesheet
+
+
+# Without the layout, assume the first few images are visible when the page loads
+ABOVE_THE_FOLD_IMAGES = 3
+
+MAX_STYLESHEETS = 4
+
+FONT_FACE_RE = re.compile(r"@font-face\s*{([^}]*)}", re.IGNORECASE)
+
+
+class RenderBlockingScriptCheck(HTMLCheck):
+    tags = {"script"}
+
+    def start(self) -> None:
+        self.issues = Issues()
+
+    def visit(self, script: bs4.element.Tag) -> None:
+        if not script.get("src") or not script.find_parent("head"):
+            return
+
+        if (
+            script.has_attr("defer")
+            or script.has_attr("async")
+            or script.get("type") == "module"
+        ):
+            return
+
+        self.issues.append(
+            Issue(
+                type="render-blocking-script",
+                description="Scripts in the <head> should use defer or async, so they don't block the page from rendering.",
+                context={"element": str(script)},
+            )
+        )
+
+    def finish(self) -> Issues:
+        return self.issues
+
+
+class ImgDimensionsCheck(HTMLCheck):
+    tags = {"img"}
+
+    def start(self) -> None:
+        self.issues = Issues()
+
+    def visit(self, img: bs4.element.Tag) -> None:
+        if not img.get("width") or not img.get("height"):
+            self.issues.append(
+                Issue(
+                    type="image-dimensions-missing",
+                    description="All <img> tags should have a width and height, so the page doesn't shift around as they load.",
+                    context={"element": str(img)},
+                )
+            )
+
+    def finish(self) -> Issues:
+        return self.issues
+
+
+class ImgLazyLoadingCheck(HTMLCheck):
+    tags = {"img"}
+
+    def start(self) -> None:
+        self.issues = Issues()
+        self.count = 0
+
+    def visit(self, img: bs4.element.Tag) -> None:
+        self.count += 1
+
+        if self.count <= ABOVE_THE_FOLD_IMAGES or img.get("loading") == "lazy":
+            return
+
+        self.issues.append(
+            Issue(
+                type="image-lazy-loading-missing",
+                description='Images further down the page should use loading="lazy", so they only load when needed.',
+                context={"element": str(img)},
+            )
+        )
+
+    def finish(self) -> Issues:
+        return self.issues
+
+
+class StylesheetCountCheck(HTMLCheck):
+    tags = {"link"}
+
+    def start(self) -> None:
+        self.stylesheets: List[str] = []
+
+    def visit(self, link: bs4.element.Tag) -> None:
+        rels = link.get("rel") or []
+        if "stylesheet" in rels and "alternate" not in rels:
+            self.stylesheets.append(link.get("href", ""))
+
+    def finish(self) -> Issues:
+        issues = Issues()
+
+        if len(self.stylesheets) > MAX_STYLESHEETS:
+            issues.append(
+                Issue(
+                    type="stylesheets-too-many",
+                    description=f"Pages shouldn't load more than {MAX_STYLESHEETS} stylesheets, which can be combined into fewer files.",
+                    context={
+                        "count": len(self.stylesheets),
+                        "stylesheets": self.stylesheets,
+                    },
+                )
+            )
+
+        return issues
+
+
+class FontDisplayCheck(HTMLCheck):
+    """
+    Web fonts should have a font-display, so text is visible while they load.
+    Same-site stylesheets are read once everything has been built.
+    """
+
+    tags = {"style", "link"}
+
+    skip_prefixes = ("//", "http:", "https:", "data:")
+
+    deferred = True
+
+    def __init__(
+        self, html_soup: bs4.BeautifulSoup, file_path: str, output_dir: str
+    ) -> None:
+        super().__init__(html_soup)
+        self.file_path = file_path
+        self.output_dir = output_dir
+
+    def start(self) -> None:
+        # Inline font faces and links to Google Fonts, in document order
+        self.elements: List[str] = []
+        self.stylesheet_paths: List[str] = []
+
+    def visit(self, node: bs4.element.Tag) -> None:
+        if node.name == "style":
+            for font_face in find_font_faces_without_display(get_style_text(node)):
+                self.elements.append(font_face)
+            return
+
+        if "stylesheet" not in (node.get("rel") or []):
+            return
+
+        href = (node.get("href") or "").strip()
+
+        if "fonts.googleapis.com/css" in href:
+            if "display=" not in href:
+                self.elements.append(str(node))
+            return
+
+        href = href.split("#")[0].split("?")[0]
+        if not href or href.startswith(self.skip_prefixes):
+            return
+
+        if href.startswith("/"):
+            path = resolve_link(self.output_dir, href[1:])
+        else:
+            path = resolve_link(self.file_path, href)
+
+        if path not in self.stylesheet_paths:
+            self.stylesheet_paths.append(path)
+
+    def finish(self) -> Issues:
+        return self.get_issues(read_stylesheet)
+
+    def finish_deferred(self, output_index: OutputIndex) -> Issues:
+        return self.get_issues(output_index.get_stylesheet)
+
+    def get_issues(self, get_stylesheet: Callable[[str], str]) -> Issues:
+        issues = Issues()
+
+        missing: List[Tuple[Optional[str], str]] = [
+            (None, element) for element in self.elements
+        ]
+        for path in self.stylesheet_paths:
+            for font_face in find_font_faces_without_display(get_stylesheet(path)):
+                missing.append((path, font_face))
+
+        for stylesheet_path, element in missing:
+            context = {"element": element}
+            if stylesheet_path:
+                context["stylesheet"] = os.path.relpath(stylesheet_path)
+
+            issues.append(
+                Issue(
+                    type="font-display-missing",
+                    description="Web fonts should set font-display (usually to swap), so text is visible while they load.",
+                    context=context,
+                )
+            )
+
+        return issues
+
+
+def find_font_faces_without_display(css: str) -> List[str]:
+    """The @font-face rules in some CSS that don't have a font-display"""
+    return [
+        " ".join(match.group(0).split())
+        for match in FONT_FACE_RE.finditer(css)
+        if "font-display" not in match.group(1).lower()
+    ]
@@ -1,5 +1,7 @@
+from typing import Optional
+
 import bs4
-from .base import Check
+from .base import HTMLCheck
 from .issues import Issues, Issue
 
 
@@ -12,22 +14,26 @@ from .issues import Issues, Issue
 # _titles_seen = set()
 
 
-class TitleCheck(Check):
-    def __init__(self, html_soup: bs4.BeautifulSoup) -> None:
-        self.html_soup = html_soup
+class TitleCheck(HTMLCheck):
+    tags = {"title"}
 
-    def run(self) -> Issues:
-        issues = Issues()
+    def start(self) -> None:
+        self.title_tag: Optional[bs4.element.Tag] = None
 
-        title = self.html_soup.title
+    def visit(self, element: bs4.element.Tag) -> None:
+        if not self.title_tag:
+            self.title_tag = element
 
-        if not title:
+    def finish(self) -> Issues:
+        issues = Issues()
+
+        if not self.title_tag:
             issues.append(
                 Issue(type="title-missing", description="The title tag is missing.")
             )
             return issues
 
-        title = title.string
+        title = self.title_tag.string
 
         # if title in _titles_seen:
         #     issues.append(
@@ -1,7 +1,7 @@
 import logging
 import os
 import sys
-from typing import List
+from typing import List, Optional
 
 import click
 import pygments
@@ -14,6 +14,7 @@ from .core import Combine
 from .logger import logger
 from .dev import Watcher, Server
 from .exceptions import BuildError
+from .checks.parsers import HTML_PARSERS
 from . import __version__
 
 
@@ -29,9 +30,49 @@ def cli(ctx: click.Context) -> None:
 @click.option("--env", default="production")
 @click.option("--var", multiple=True, default=[])
 @click.option("--debug", is_flag=True, default=False)
+@click.option(
+    "--clean",
+    is_flag=True,
+    default=False,
+    help="Remove the existing output and render every file from scratch",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=None,
+    help="Number of processes to render with (0 to use every core)",
+)
+@click.option(
+    "--precompiled",
+    is_flag=True,
+    default=False,
+    help="Use the templates compiled by `combine compile`",
+)
+@click.option(
+    "--html-parser",
+    type=click.Choice(["auto"] + HTML_PARSERS),
+    default=None,
+    help="The parser to use for checks (defaults to the fastest one installed)",
+)
+@click.option(
+    "--external-links",
+    is_flag=True,
+    default=False,
+    help="Also check links to other sites (with --check)",
+)
 @click.pass_context
 def build(
-    ctx: click.Context, check: bool, env: str, var: List[str], debug: bool
+    ctx: click.Context,
+    check: bool,
+    env: str,
+    var: List[str],
+    debug: bool,
+    clean: bool,
+    jobs: Optional[int],
+    precompiled: bool,
+    html_parser: Optional[str],
+    external_links: bool,
 ) -> None:
     """Build the site (typically during deployment)"""
     if debug:
@@ -39,11 +80,18 @@ def build(
 
     variables = dict(x.split("=") for x in var)
     config_path = os.path.abspath("combine.yml")
-    combine = Combine(config_path=config_path, env=env, variables=variables)
+    combine = Combine(
+        config_path=config_path,
+        env=env,
+        variables=variables,
+        precompiled=precompiled,
+        html_parser=html_parser,
+        external_links=external_links,
+    )
 
     click.secho("Building site", bold=True, color=True)
     try:
-        combine.build(check=check)
+        combine.build(check=check, clean=clean, jobs=jobs)
     except BuildError:
         click.secho("Build error (see above)", fg="red", color=True)
         exit(1)
@@ -60,6 +108,49 @@ def build(
             click.secho("✓ All checks passed", fg="green", color=True)
 
 
+@cli.command()
+@click.option("--env", default="production")
+@click.option("--var", multiple=True, default=[])
+@click.option("--debug", is_flag=True, default=False)
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=0,
+    help="Number of processes to compile with (defaults to every core)",
+)
+@click.pass_context
+def compile(
+    ctx: click.Context, env: str, var: List[str], debug: bool, jobs: int
+) -> None:
+    """Compile every template ahead of time (use with `build --precompiled`)"""
+    if debug:
+        logger.setLevel(logging.DEBUG)
+
+    variables = dict(x.split("=") for x in var)
+    config_path = os.path.abspath("combine.yml")
+    combine = Combine(config_path=config_path, env=env, variables=variables)
+
+    click.secho("Compiling templates", bold=True, color=True)
+    errors = combine.compile_templates(jobs=jobs)
+
+    if errors:
+        for template_path, error in errors.items():
+            logger.error(f"Error compiling {template_path}", exc_info=error)
+        click.secho(
+            f"{len(errors)} template{'s' if len(errors) > 1 else ''} failed to compile",
+            fg="red",
+            color=True,
+        )
+        exit(1)
+
+    click.secho(
+        f"✓ Compiled templates to {os.path.relpath(combine.compiled_templates_path)}",
+        fg="green",
+        color=True,
+    )
+
+
 @cli.command()
 @click.option("--port", type=int, default=8000)
 @click.option("--debug", is_flag=True, default=False)
@@ -1,10 +1,12 @@
-from typing import List, Iterator, Union
+from typing import Iterable, List, Iterator, Optional, Pattern, Tuple, Union
 import os
+import re
 import datetime
 import subprocess
 import shlex
-from fnmatch import fnmatch
+from fnmatch import translate
 import json
+from .checks.page_weight import PageWeightBudgets
 from .logger import logger
 import yaml
 
@@ -21,6 +23,12 @@ class Config:
     def output_path(self) -> str:
         return os.path.abspath(self.data.get("output_path", "output"))
 
+    @property
+    def cache_path(self) -> str:
+        return os.path.abspath(
+            self.data.get("cache_path", os.path.join(".cache", "combine"))
+        )
+
     @property
     def content_paths(self) -> List[str]:
         if "content_paths" in self.data:
@@ -35,6 +43,37 @@ class Config:
 
         return [os.path.abspath(x) for x in paths]
 
+    @property
+    def bytecode_cache(self) -> bool:
+        return bool(self.data.get("bytecode_cache", True))
+
+    @property
+    def render_cache(self) -> bool:
+        return bool(self.data.get("render_cache", True))
+
+    @property
+    def jobs(self) -> int:
+        return int(self.data.get("jobs", 1))
+
+    @property
+    def html_parser(self) -> str:
+        return str(self.data.get("html_parser", "auto"))
+
+    @property
+    def external_links(self) -> Optional[dict]:
+        """Settings for checking external links, or None if they aren't checked"""
+        value = self.data.get("external_links", False)
+
+        if isinstance(value, dict):
+            return value
+
+        return {} if value else None
+
+    @property
+    def page_weight(self) -> PageWeightBudgets:
+        """Page weight budgets by glob (of the output path)"""
+        return PageWeightBudgets(self.data.get("page_weight", {}))
+
     @property
     def variables(self) -> dict:
         variables = self.default_variables
@@ -127,26 +166,63 @@ class BuildStep:
 
         return subprocess.run(shlex.split(self.run), check=check)
 
+    @property
+    def watch_patterns(self) -> List[str]:
+        return self.watch if self.has_watch_patterns else []  # type: ignore
+
     def watch_pattern_match(self, path: str) -> str:
-        if not self.has_watch_patterns:
-            return ""
-
-        for pattern in self.watch:  # type: ignore
-            match = False
-
-            if pattern.startswith("/"):
-                # Absolute path pattern
-                match = fnmatch(os.path.abspath(path), pattern)
-            elif pattern.startswith("./"):
-                # Specified relative path pattern
-                match = fnmatch(os.path.relpath(path), pattern[2:])
-            else:
-                # Implied relative path pattern
-                match = fnmatch(os.path.relpath(path), pattern)
+        for _, pattern in StepWatchMatcher([self]).match(path):
+            return pattern
 
-            logger.debug(f"Checking {path} against {pattern} -- {match}")
+        return ""
 
-            if match:
-                return pattern
 
-        return ""
+def get_absolute_watch_pattern(pattern: str) -> str:
+    if pattern.startswith("/"):
+        # Absolute path pattern
+        return os.path.normpath(pattern)
+
+    if pattern.startswith("./"):
+        # Specified relative path pattern
+        pattern = pattern[2:]
+
+    # (Implied) relative path pattern, normalized like the paths it's matched against
+    return os.path.normpath(os.path.join(os.getcwd(), pattern))
+
+
+class StepWatchMatcher:
+    """
+    The watch patterns of every step, compiled into a single regex.
+    Every changed file is checked against them and most don't match any,
+    so those only take one regex match.
+    """
+
+    def __init__(self, steps: Iterable[BuildStep]) -> None:
+        self.patterns: List[Tuple[BuildStep, str, Pattern]] = []
+
+        for step in steps:
+            for pattern in step.watch_patterns:
+                regex = translate(os.path.normcase(get_absolute_watch_pattern(pattern)))
+                self.patterns.append((step, pattern, re.compile(regex)))
+
+        self.regex: Optional[Pattern] = None
+        if self.patterns:
+            self.regex = re.compile("|".join(x[2].pattern for x in self.patterns))
+
+    def match(self, path: str) -> List[Tuple[BuildStep, str]]:
+        """The steps that match this path (and the first pattern that matched each)"""
+        if not self.regex:
+            return []
+
+        path = os.path.normcase(os.path.abspath(path))
+        if not self.regex.match(path):
+            return []
+
+        matches: List[Tuple[BuildStep, str]] = []
+
+        for step, pattern, regex in self.patterns:
+            if step not in [x[0] for x in matches] and regex.match(path):
+                logger.debug(f"{path} matches {pattern}")
+                matches.append((step, pattern))
+
+        return matches
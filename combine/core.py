@@ -1,64 +1,172 @@
 import os
+import json
 import shutil
 import logging
-from typing import List, Optional, Iterator, Set, Type
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Iterator, Set, Tuple, Type
 
 import jinja2
 
 from .config import Config
 from .files import file_class_for_path, ErrorFile
+from .files.markdown import forget_frontmatter
 from .jinja import default_extensions, default_filters
 from .jinja.exceptions import ReservedVariableError
-from .exceptions import BuildError
+from .jinja.loaders import ContentLoader, PrecompiledLoader, hash_source
+from .jinja.references import DYNAMIC_REFERENCE, get_reference_index
+from .exceptions import BuildCancelled, BuildError
+from .manifest import ERROR_FINGERPRINT, BuildManifest, hash_data
+from .cache import RenderCache
+from .dependencies import DependencyGraph
+from . import workers
 from .checks.favicon import FaviconCheck
 from .checks.issues import Issues
-from .files import File
+from .checks.parsers import get_html_parser
+from .files import File, HTMLFile
+from .checks.base import FileChecks, HTMLCheck
+from .checks.cache import CheckCache
+from .checks.output_index import OutputIndex
+from .checks.external_links import get_external_link_checker
 
 
 logger = logging.getLogger(__file__)
 
 
 class Combine:
-    def __init__(self, config_path: str, env: str = None, variables: dict = {}) -> None:
+    def __init__(
+        self,
+        config_path: str,
+        env: Optional[str] = None,
+        variables: dict = {},
+        precompiled: bool = False,
+        load_content: bool = True,
+        html_parser: Optional[str] = None,
+        external_links: bool = False,
+    ) -> None:
         self.config_path = config_path
         self.env = env
         self.variables = variables
+        self.precompiled = precompiled
+        self.load_content = load_content
+        self.html_parser = html_parser
+        self.external_links = external_links
         self.load()
 
+        self.manifest = BuildManifest(
+            path=os.path.join(self.config.cache_path, "manifest.json"),
+            output_path=self.output_path,
+        )
+        self.manifest.load()
+
+        self.check_cache = CheckCache(os.path.join(self.config.cache_path, "checks"))
+
     def load(self) -> None:
         self.config = Config(self.config_path)
 
-        self.jinja_environment = self.get_jinja_environment(
-            content_paths=self.config.content_paths,
-            variables=self.get_jinja_variables(self.config.variables),
-        )
+        # Parsed up front, so a bad budget fails before anything is built
+        self.page_weight_budgets = self.config.page_weight
+
+        jinja_variables = self.get_jinja_variables(self.config.variables)
+        self.variables_hash = hash_data(jinja_variables)
 
         self.content_directories = []
         for path in self.config.content_paths:
             cd = ContentDirectory(path)
-            cd.load(self.jinja_environment)
+            cd.walk()
             self.content_directories.append(cd)
 
+        self.content_loader = ContentLoader(self.content_directories)
+
+        if self.precompiled:
+            self.jinja_environment = self.get_jinja_environment(
+                loader=PrecompiledLoader(
+                    self.compiled_templates_path, source_loader=self.content_loader
+                ),
+                variables=jinja_variables,
+            )
+        else:
+            self.jinja_environment = self.get_jinja_environment(
+                loader=self.content_loader,
+                variables=jinja_variables,
+                bytecode_cache=self.get_jinja_bytecode_cache(),
+            )
+
+        self.dependencies = DependencyGraph()
+
+        if not self.load_content:
+            return
+
+        for cd in self.content_directories:
+            cd.load(self.jinja_environment)
+
+        for file in self.iter_files():
+            self.dependencies.add_file(file)
+
     @property
     def output_path(self) -> str:
         return self.config.output_path
 
+    @property
+    def compiled_templates_path(self) -> str:
+        return os.path.join(self.config.cache_path, "templates")
+
     def get_jinja_environment(
-        self, content_paths: List[str], variables: dict
+        self,
+        loader: jinja2.BaseLoader,
+        variables: dict,
+        bytecode_cache: Optional[jinja2.BytecodeCache] = None,
     ) -> jinja2.Environment:
-        choice_loaders = [jinja2.FileSystemLoader(x) for x in content_paths]
-
         jinja_environment = jinja2.Environment(
-            loader=jinja2.ChoiceLoader(choice_loaders),
+            loader=loader,
             autoescape=jinja2.select_autoescape(["html", "xml"]),
             undefined=jinja2.StrictUndefined,  # make sure variables exist
             extensions=default_extensions,
+            bytecode_cache=bytecode_cache,
         )
         jinja_environment.globals.update(variables)
         jinja_environment.filters.update(default_filters)
+        jinja_environment.extend(
+            render_cache=RenderCache(
+                os.path.join(self.config.cache_path, "render")
+                if self.config.render_cache
+                else None
+            ),
+            variables_hash=hash_data(variables),
+        )
 
         return jinja_environment
 
+    def get_jinja_bytecode_cache(self) -> Optional[jinja2.BytecodeCache]:
+        """
+        Compiled templates are cached on disk between runs. Jinja only checks the
+        template source, so anything else that changes the compiled output
+        (our version, Jinja's version, the extensions) gets its own directory.
+        """
+        if not self.config.bytecode_cache:
+            return None
+
+        from . import __version__
+
+        key = hash_data(
+            [
+                __version__,
+                jinja2.__version__,
+                [f"{x.__module__}.{x.__qualname__}" for x in default_extensions],
+            ]
+        )[:16]
+
+        cache_root = os.path.join(self.config.cache_path, "jinja")
+        cache_dir = os.path.join(cache_root, key)
+
+        if not os.path.exists(cache_dir):
+            # Anything else in here is from an old version or set of extensions
+            if os.path.exists(cache_root):
+                shutil.rmtree(cache_root, ignore_errors=True)
+            os.makedirs(cache_dir, exist_ok=True)
+
+        return jinja2.FileSystemBytecodeCache(cache_dir)
+
     def get_jinja_variables(self, config_variables: dict) -> dict:
         """
         1. combine.yml variables
@@ -81,22 +189,199 @@ class Combine:
         """Reload the config and entire jinja environment"""
         self.load()
 
+    def refresh_path(self, path: str) -> None:
+        """
+        Pick up changes to an existing content file without reloading everything.
+        Only the cached source and references for that file are thrown away.
+        """
+        path = os.path.abspath(path)
+
+        self.content_loader.invalidate(path)
+        get_reference_index(self.jinja_environment).invalidate(path)
+        forget_frontmatter(path)
+
+        content_relative_path = self.content_relative_path(path)
+        if not content_relative_path:
+            return
+
+        self.reload_related_files(content_relative_path)
+
+    def add_path(self, path: str) -> List[File]:
+        """
+        Pick up a new content file (or a directory of them) without reloading everything.
+        Only the new files are loaded, along with anything that already referenced them.
+        """
+        path = os.path.abspath(path)
+
+        content_directory = self.get_content_directory(path)
+        if not content_directory:
+            return []
+
+        if os.path.isdir(path):
+            paths = [
+                os.path.join(root, filename)
+                for root, _, filenames in os.walk(path, followlinks=True)
+                for filename in filenames
+            ]
+        elif os.path.exists(path):
+            paths = [path]
+        else:
+            return []
+
+        known_paths = set(x.path for x in content_directory.files)
+        added = []
+
+        for file_path in sorted(paths):
+            if file_path in known_paths:
+                continue
+
+            file = file_class_for_path(file_path)(file_path, content_directory)
+            content_directory.files.append(file)
+            added.append(file)
+
+        if not added:
+            return []
+
+        # A new file can take the place of one in a lower priority content directory
+        replaced_paths = [
+            self.content_loader.get_path(x.content_relative_path) for x in added
+        ]
+        self.content_loader.index()
+
+        for replaced_path in replaced_paths:
+            if replaced_path:
+                self.content_loader.invalidate(replaced_path)
+
+        get_reference_index(self.jinja_environment).invalidate(path)
+
+        for file in added:
+            self.dependencies.add_file(file)
+
+        for file in added:
+            # Includes the new file, and anything that referenced it before it existed
+            self.reload_related_files(file.content_relative_path)
+
+        return added
+
+    def remove_path(self, path: str) -> List[File]:
+        """
+        Forget a deleted content file (or directory of them) without reloading everything.
+        Their outputs are removed, and the files that used them are returned to be rebuilt.
+        """
+        path = os.path.abspath(path)
+
+        content_directory = self.get_content_directory(path)
+        if not content_directory:
+            return []
+
+        removed = [
+            x
+            for x in content_directory.files
+            if x.path == path or x.path.startswith(path + os.sep)
+        ]
+        if not removed:
+            return []
+
+        for file in removed:
+            content_directory.files.remove(file)
+            self.dependencies.remove_file(file)
+
+        self.content_loader.index()
+
+        reference_index = get_reference_index(self.jinja_environment)
+        for file in removed:
+            self.content_loader.invalidate(file.path)
+            reference_index.invalidate(file.path)
+            forget_frontmatter(file.path)
+
+        # A file in a lower priority content directory can still render the same output
+        remaining_outputs = set(x.output_relative_path for x in self.iter_files())
+        for file in removed:
+            if (
+                file.output_relative_path
+                and file.output_relative_path not in remaining_outputs
+            ):
+                logger.debug("Removing output: %s", file.output_relative_path)
+                self.manifest.remove_output(file.output_relative_path)
+
+        self.manifest.save()
+
+        related = []
+        for file in removed:
+            # Anything that referenced it (or a file it was hiding) is reloaded
+            self.reload_related_files(file.content_relative_path)
+
+            for related_file in self.get_related_files(file.content_relative_path):
+                if related_file not in related:
+                    related.append(related_file)
+
+        return related
+
+    def reload_related_files(self, content_relative_path: str) -> None:
+        """Anything that used this path may reference different templates now"""
+        for file in self.get_related_files(content_relative_path):
+            try:
+                file.load(self.jinja_environment)
+            except Exception as e:
+                logger.debug("Error loading %s", file.path, exc_info=e)
+            self.dependencies.update_file(file)
+
+    def get_content_directory(self, path: str) -> Optional["ContentDirectory"]:
+        """The (highest priority) content directory that a path is in"""
+        for content_directory in self.content_directories:
+            if os.path.commonpath([content_directory.path, path]) == (
+                content_directory.path
+            ):
+                return content_directory
+
+        return None
+
     def clean(self) -> None:
         if os.path.exists(self.output_path):
             shutil.rmtree(self.output_path)
 
-    def build(self, only_paths: List[str] = [], check: bool = True) -> None:
-        build_errors = {}
+        self.manifest.clear()
 
-        if not only_paths:
+    def build(
+        self,
+        only_paths: List[str] = [],
+        check: bool = True,
+        clean: bool = False,
+        jobs: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        """
+        Render the site into the output path.
+
+        A full build (no only_paths) only re-renders files whose inputs changed
+        since the last build, according to the manifest. Without a manifest
+        (or with clean=True) the output path is wiped and everything is rendered.
+
+        With more than one job, files are rendered across a pool of processes
+        (only for full builds).
+        Each file is checked as soon as it's written (in the same process),
+        and checks that depend on the rest of the site are finished at the end.
+
+        If the cancel event is set, the build stops at the next file and raises BuildCancelled.
+        Output files are replaced all at once, so nothing is left half-written.
+        """
+        build_errors: Dict[str, Exception] = {}
+        html_parser = self.get_html_parser() if check else None
+
+        # Fragments can depend on anything that changed since the last build
+        self.jinja_environment.fragment_cache.clear()  # type: ignore
+
+        if clean or (not only_paths and not self.manifest):
             # completely wipe it
             self.clean()
 
         if not os.path.exists(self.output_path):
-            os.mkdir(self.output_path)
+            os.makedirs(self.output_path)
 
-        paths_rendered = []
-        files_rendered = []
+        paths_rendered: Set[str] = set()
+        files_to_build = []
+        files_to_render = []
+        reference_hashes: Dict[str, str] = {}
 
         for file in self.iter_files():
             if (
@@ -106,36 +391,398 @@ class Combine:
                 if only_paths and file.path not in only_paths:
                     continue
 
-                try:
-                    file.load(self.jinja_environment)
-                    file.render(
-                        output_path=self.output_path,
-                        jinja_environment=self.jinja_environment,
-                    )
-                    files_rendered.append(file)
-                except Exception as e:
-                    build_errors[file.path] = e
-                    ErrorFile(file.path, file.content_directory, error=e).render(
-                        output_path=self.output_path,
-                        jinja_environment=self.jinja_environment,
+                paths_rendered.add(file.output_relative_path)
+                files_to_build.append(file)
+
+                fingerprint = self.get_file_fingerprint(file, reference_hashes)
+
+                if (
+                    not only_paths
+                    # Can't tell what these use without rendering them
+                    and DYNAMIC_REFERENCE not in file.references
+                    and self.manifest.is_current(file.output_relative_path, fingerprint)
+                ):
+                    logger.debug("Unchanged since last build: %s", file.path)
+                    file.output_path = os.path.join(
+                        self.output_path, file.output_relative_path
                     )
+                    continue
+
+                files_to_render.append(file)
+
+        # Unchanged files still need to be checked
+        files_to_check = (
+            [x for x in files_to_build if x not in files_to_render] if check else []
+        )
 
-                paths_rendered.append(file.output_relative_path)
+        if only_paths:
+            # A few files aren't worth starting (and loading) a pool of workers for
+            jobs = 1
+        else:
+            jobs = self.get_jobs(jobs)
+
+        results: List[Optional[Exception]] = []
+        file_checks: Dict[str, FileChecks] = {}
+
+        try:
+            if jobs > 1 and len(files_to_render) + len(files_to_check) > 1:
+                results, file_checks = self.render_files_in_pool(
+                    files_to_render,
+                    jobs,
+                    files_to_check=files_to_check,
+                    html_parser=html_parser,
+                    cancel=cancel,
+                )
+            else:
+                for file in files_to_render:
+                    raise_if_cancelled(cancel)
+
+                    try:
+                        self.render_file(file)
+                        results.append(None)
+                    except Exception as e:
+                        results.append(e)
+                        continue
+
+                    if html_parser:
+                        file_checks[file.path] = self.check_file(file, html_parser)
+        except BuildCancelled:
+            # The files that were rendered are complete, but the manifest
+            # doesn't know about them (so they'll be rendered again)
+            release_rendered_html(files_to_render)
+            raise
+
+        for file, error in zip(files_to_render, results):
+            if error:
+                build_errors[file.path] = error
+                self.manifest.record(
+                    file.output_relative_path, file.path, ERROR_FINGERPRINT
+                )
+            else:
+                self.dependencies.update_file(file)
+                self.manifest.record(
+                    file.output_relative_path,
+                    file.path,
+                    # References may have changed when the file was loaded
+                    self.get_file_fingerprint(file, reference_hashes),
+                )
 
         if not only_paths:
-            self.config.run_build_steps()
+            # Remove the outputs of anything that is no longer in the site
+            for output_relative_path in list(self.manifest.entries.keys()):
+                if output_relative_path not in paths_rendered:
+                    logger.debug("Removing stale output: %s", output_relative_path)
+                    self.manifest.remove_output(output_relative_path)
+
+            self.manifest.retain_sources(set(x.path for x in self.iter_files()))
+
+        self.manifest.save()
+
+        try:
+            if not only_paths:
+                self.config.run_build_steps()
+
+            if build_errors:
+                for file_path, error in build_errors.items():
+                    logger.error(f"Error building {file_path}", exc_info=error)
+                raise BuildError()
+
+            if check:
+                self.check_build(
+                    files=files_to_build,
+                    site_checks=(not only_paths),
+                    file_checks=file_checks,
+                    cancel=cancel,
+                )
+
+            if not only_paths:
+                # Everything this build used has been touched by now
+                self.prune_caches()
+        finally:
+            release_rendered_html(files_to_render)
+
+    def prune_caches(self) -> None:
+        """Keep the render and check caches from growing without limit"""
+        self.jinja_environment.render_cache.prune()  # type: ignore
+        self.check_cache.prune()
+
+    def get_jobs(self, jobs: Optional[int] = None) -> int:
+        if jobs is None:
+            jobs = self.config.jobs
+
+        if jobs < 1:
+            # 0 means use every core
+            jobs = os.cpu_count() or 1
+
+        return jobs
+
+    def render_file(self, file: File) -> None:
+        """Render a single file, writing an error page in its place if it fails"""
+        try:
+            file.load(self.jinja_environment)
+            file.render(
+                output_path=self.output_path,
+                jinja_environment=self.jinja_environment,
+            )
+        except Exception as e:
+            ErrorFile(file.path, file.content_directory, error=e).render(
+                output_path=self.output_path,
+                jinja_environment=self.jinja_environment,
+            )
+            raise
+
+    def check_file(self, file: File, html_parser: str) -> FileChecks:
+        """
+        Check a file that was just written, deferring anything that needs the rest of the site.
+        HTML that was checked before (same content) reuses the cached results.
+        """
+        if not isinstance(file, HTMLFile):
+            deferred: List[HTMLCheck] = []
+            issues = file.check_output(html_parser=html_parser, deferred=deferred)
+            return issues, deferred
+
+        try:
+            if file.rendered_html is None:
+                with open(file.output_path, "r") as f:
+                    file.rendered_html = f.read()
+
+            key = self.check_cache.key(
+                file.rendered_html, html_parser, file.output_path
+            )
+            checks = self.check_cache.get(key)
+
+            if checks is None:
+                deferred = []
+                issues = file.check_output(html_parser=html_parser, deferred=deferred)
+                checks = (issues, deferred)
+                self.check_cache.set(key, checks)
+            else:
+                logger.debug("Using cached checks for %s", file.path)
+        finally:
+            file.rendered_html = None
+
+        return checks
+
+    def render_files_in_pool(
+        self,
+        files: List[File],
+        jobs: int,
+        files_to_check: List[File] = [],
+        html_parser: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[List[Optional[Exception]], Dict[str, FileChecks]]:
+        """
+        Render files across worker processes that each keep a warm Jinja environment.
+        With an html_parser, each file is also checked by the worker that rendered it
+        (and files_to_check are checked without rendering).
+
+        Returns the error (if any) for each rendered file, in the same order as files,
+        and the checks for each file path.
+        """
+        results: List[Optional[Exception]] = []
+        file_checks: Dict[str, FileChecks] = {}
+
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(files) + len(files_to_check)),
+            initializer=workers.init_worker,
+            initargs=(
+                os.path.abspath(self.config_path),
+                self.env,
+                self.variables,
+                self.precompiled,
+                False,  # each file is loaded when it's rendered
+            ),
+        ) as executor:
+            futures = [
+                executor.submit(workers.render_file, x.path, html_parser) for x in files
+            ]
+            check_futures = [
+                executor.submit(workers.check_file, x.path, html_parser)
+                for x in files_to_check
+                if html_parser
+            ]
+
+            for file, future in zip(files, futures):
+                if cancel and cancel.is_set():
+                    # Files that are already being rendered will finish first
+                    for pending in futures + check_futures:
+                        pending.cancel()
+                    raise BuildCancelled()
+
+                try:
+                    file.output_path, file.references, checks = future.result()
+                    results.append(None)
+                except Exception as e:
+                    results.append(e)
+                    continue
+
+                if checks:
+                    file_checks[file.path] = checks
+
+            for file, check_future in zip(files_to_check, check_futures):
+                file_checks[file.path] = check_future.result()
+
+        return results, file_checks
+
+    def iter_templates(self) -> Iterator[File]:
+        """Every file that gets loaded as a Jinja template (the first one for each name)"""
+        names = set()
+        for file in self.iter_files():
+            if file.is_template() and file.content_relative_path not in names:
+                names.add(file.content_relative_path)
+                yield file
+
+    def compile_templates(self, jobs: Optional[int] = None) -> Dict[str, Exception]:
+        """
+        Compile every template to a Python module ahead of time,
+        for use with precompiled=True. Returns any errors by template path.
+        """
+        target_path = self.compiled_templates_path
+        if os.path.exists(target_path):
+            shutil.rmtree(target_path)
+        os.makedirs(target_path)
+
+        templates = list(self.iter_templates())
+        names = [x.content_relative_path for x in templates]
+        errors: Dict[str, Exception] = {}
+        source_hashes: Dict[str, str] = {}
+
+        jobs = self.get_jobs(jobs)
+
+        if jobs > 1 and len(templates) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(jobs, len(templates)),
+                initializer=workers.init_worker,
+                initargs=(
+                    os.path.abspath(self.config_path),
+                    self.env,
+                    self.variables,
+                    False,  # compile from source
+                    False,  # only the Jinja environment is needed
+                ),
+            ) as executor:
+                futures = [
+                    executor.submit(workers.compile_template, x, target_path)
+                    for x in names
+                ]
+                for template, future in zip(templates, futures):
+                    try:
+                        source_hashes[template.path] = future.result()
+                    except Exception as e:
+                        errors[template.path] = e
+        else:
+            for template, name in zip(templates, names):
+                try:
+                    source_hashes[template.path] = self.compile_template(
+                        name, target_path
+                    )
+                except Exception as e:
+                    errors[template.path] = e
+
+        with open(
+            os.path.join(target_path, PrecompiledLoader.index_filename), "w"
+        ) as f:
+            json.dump(
+                {
+                    name: {
+                        "path": template.path,
+                        "hash": source_hashes[template.path],
+                    }
+                    for template, name in zip(templates, names)
+                    if template.path not in errors
+                },
+                f,
+            )
+
+        return errors
+
+    def compile_template(self, name: str, target_path: str) -> str:
+        """Compile one template, returning the hash of the source it was compiled from"""
+        source, filename, _ = self.jinja_environment.loader.get_source(  # type: ignore
+            self.jinja_environment, name
+        )
+        # Same as Environment.compile_templates, one template at a time
+        code = self.jinja_environment.compile(
+            source, name, filename, raw=True, defer_init=True
+        )
 
-        if build_errors:
-            for file_path, error in build_errors.items():
-                logger.error(f"Error building {file_path}", exc_info=error)
-            raise BuildError()
+        module_filename = jinja2.ModuleLoader.get_module_filename(name)
+        with open(os.path.join(target_path, module_filename), "wb") as f:
+            f.write(code.encode("utf8"))
 
-        if check:
-            self.check_build(files=files_rendered, site_checks=(not only_paths))
+        return hash_source(source)
 
-    def check_build(self, files: List[File] = [], site_checks: bool = False) -> None:
+    def get_file_fingerprint(self, file: File, reference_hashes: Dict[str, str]) -> str:
+        """
+        Combine everything that goes into rendering a file --
+        the file itself, the templates (and include_raw files) it references,
+        and the site variables.
+        """
+        parts = [
+            file.__class__.__name__,
+            file.path,
+            self.manifest.hash_source(file.path),
+            self.variables_hash,
+        ]
+
+        for reference in sorted(file.references):
+            if reference == DYNAMIC_REFERENCE:
+                continue
+
+            if reference not in reference_hashes:
+                reference_hashes[reference] = self.get_reference_hash(
+                    reference, file.content_directory.path
+                )
+            parts.append(f"{reference}:{reference_hashes[reference]}")
+
+        return hash_data(parts)
+
+    def get_reference_hash(self, reference: str, content_path: str) -> str:
+        try:
+            _, filename, _ = self.jinja_environment.loader.get_source(  # type: ignore
+                self.jinja_environment, reference
+            )
+        except jinja2.TemplateNotFound:
+            # Markdown templates are referenced relative to their content directory
+            filename = os.path.normpath(os.path.join(content_path, reference))
+
+        if not filename or not os.path.exists(filename):
+            return ""
+
+        return self.manifest.hash_source(filename)
+
+    def get_html_parser(self) -> str:
+        # The CLI option wins over combine.yml
+        return get_html_parser(self.html_parser or self.config.html_parser)
+
+    def get_external_links_settings(self) -> Optional[dict]:
+        """External links are checked if enabled in combine.yml or by the CLI"""
+        settings = self.config.external_links
+        if settings is None and self.external_links:
+            return {}
+        return settings
+
+    def check_build(
+        self,
+        files: List[File] = [],
+        site_checks: bool = False,
+        file_checks: Optional[Dict[str, FileChecks]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        """
+        Collect the issues for the site and each file (in order), using the
+        checks that already ran during the build and running any that didn't.
+        """
         self.issues = Issues()
 
+        html_parser = self.get_html_parser()
+        file_checks = dict(file_checks or {})
+
+        # Everything has been built, so list the output once for deferred checks
+        output_index = OutputIndex(
+            self.output_path, page_weight_budgets=self.page_weight_budgets
+        )
+
         if site_checks:
             for issue in FaviconCheck(site_dir=self.output_path).run():
                 self.issues.append(issue)
@@ -144,20 +791,40 @@ class Combine:
                 self.issues.print(f"Issues across your site")
 
         for file in files:
-            # TODO could pass check settings here, just don't know what they should look like
-            for issue in file.check_output():
+            raise_if_cancelled(cancel)
+
+            if file.path not in file_checks:
+                # TODO could pass check settings here, just don't know what they should look like
+                file_checks[file.path] = self.check_file(file, html_parser)
+
+            for check in file_checks[file.path][1]:
+                check.index_site(output_index)
+
+        external_links = self.get_external_links_settings()
+        if external_links is not None and output_index.external_links:
+            checker = get_external_link_checker(
+                external_links, cache_path=self.config.cache_path
+            )
+            output_index.external_link_errors = checker.check(
+                output_index.external_links
+            )
+
+        for file in files:
+            file_issues, deferred = file_checks[file.path]
+
+            for check in deferred:
+                for issue in check.finish_deferred(output_index):
+                    file_issues.append(issue)
+
+            if file_issues:
+                file_issues.print(f"Issues in {file.content_relative_path}")
+
+            for issue in file_issues:
                 self.issues.append(issue)
 
     def get_related_files(self, content_relative_path: str) -> List[File]:
-        files = []
-        for file in self.iter_files():
-            if (
-                content_relative_path in file.references
-                or file.content_relative_path == content_relative_path
-            ):
-                # TODO could this include duplicates? in the content-relative sense?
-                files.append(file)
-        return files
+        """The file at this path (if any) and every file that references it"""
+        return self.dependencies.get_dependents(content_relative_path)
 
     def content_relative_path(self, path: str) -> Optional[str]:
         for content_path in self.config.content_paths:
@@ -180,20 +847,39 @@ class Combine:
                 yield file
 
 
+def raise_if_cancelled(cancel: Optional[threading.Event]) -> None:
+    if cancel and cancel.is_set():
+        raise BuildCancelled()
+
+
+def release_rendered_html(files: List[File]) -> None:
+    """Checks are the only reason to hold on to the rendered HTML"""
+    for file in files:
+        if isinstance(file, HTMLFile):
+            file.rendered_html = None
+
+
 class ContentDirectory:
     def __init__(self, path: str) -> None:
         assert os.path.exists(path), f"Path does not exist: {path}"
         self.path = path
+        self.files: List[File] = []
 
-    def load(self, jinja_environment: jinja2.Environment) -> None:
+    def walk(self) -> None:
         self.files = []
 
         for root, dirs, files in os.walk(self.path, followlinks=True):
             for file in files:
                 file_path = os.path.join(root, file)
-                file_obj = file_class_for_path(file_path)(file_path, self)
-                file_obj.load(jinja_environment)
-                self.files.append(file_obj)
+                self.files.append(file_class_for_path(file_path)(file_path, self))
+
+    def load(self, jinja_environment: jinja2.Environment) -> None:
+        for file in self.files:
+            try:
+                file.load(jinja_environment)
+            except Exception as e:
+                # The same error will come up (and be reported) when it's rendered
+                logger.debug("Error loading %s", file.path, exc_info=e)
 
     def file_classes(self) -> Set[Type[File]]:
         return set([x.__class__ for x in self.files])
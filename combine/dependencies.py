@@ -0,0 +1,38 @@
+from typing import Dict, List
+
+from .files import File
+
+
+class DependencyGraph:
+    """
+    Reverse index from a content-relative path (a page or a template)
+    to the files that need to be rebuilt when it changes.
+    """
+
+    def __init__(self) -> None:
+        self._dependents: Dict[str, Dict[str, File]] = {}
+        self._keys: Dict[str, List[str]] = {}
+
+    def add_file(self, file: File) -> None:
+        keys = [file.content_relative_path]
+        keys.extend(x for x in file.references if x not in keys)
+
+        for key in keys:
+            self._dependents.setdefault(key, {})[file.path] = file
+
+        self._keys[file.path] = keys
+
+    def remove_file(self, file: File) -> None:
+        for key in self._keys.pop(file.path, []):
+            dependents = self._dependents.get(key, {})
+            dependents.pop(file.path, None)
+            if not dependents:
+                self._dependents.pop(key, None)
+
+    def update_file(self, file: File) -> None:
+        """Re-index a file after its references were reloaded"""
+        self.remove_file(file)
+        self.add_file(file)
+
+    def get_dependents(self, content_relative_path: str) -> List[File]:
+        return list(self._dependents.get(content_relative_path, {}).values())
@@ -1,3 +1,4 @@
+import glob
 import threading
 import datetime
 import os
@@ -5,19 +6,68 @@ import time
 from http.server import HTTPServer as BaseHTTPServer, SimpleHTTPRequestHandler
 
 import click
-from watchfiles import watch, Change
+from watchfiles import watch, Change, DefaultFilter
 
-from .exceptions import BuildError
+from .exceptions import BuildCancelled, BuildError
 from .files.ignored import IgnoredFile
+from .files.utils import write_output
 from .logger import logger
+from .config import BuildStep, StepWatchMatcher, get_absolute_watch_pattern
 
-from typing import TYPE_CHECKING, Optional, Callable, List, Any, Tuple, Type
+from typing import TYPE_CHECKING, Optional, Callable, Dict, List, Any, Set, Tuple, Type
 
 if TYPE_CHECKING:
     from .core import Combine
     from repaint import Repaint
 
 
+BASE_CONTENT_PATH = os.path.join(os.path.dirname(__file__), "base_content")
+
+
+def get_watch_pattern_root(pattern: str, root: str = ".") -> str:
+    """The deepest directory (or file) that a step's watch pattern could match in"""
+    parts = []
+
+    for part in get_absolute_watch_pattern(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+
+    path = os.sep.join(parts) or os.sep
+
+    if os.path.commonpath([path, os.path.abspath(root)]) == path:
+        # Don't watch above the project (like "*.css" that can match anywhere)
+        return os.path.abspath(root)
+
+    return path
+
+
+def merge_changes(changes: Set[Tuple[Change, str]]) -> Set[Tuple[Change, str]]:
+    """
+    Combine the changes to each path in a batch into one. Editors that save by
+    replacing the file (delete, then add) end up with a modification.
+    """
+    changes_by_path: Dict[str, Set[Change]] = {}
+    for change, path in changes:
+        changes_by_path.setdefault(path, set()).add(change)
+
+    merged = set()
+
+    for path, path_changes in changes_by_path.items():
+        if len(path_changes) == 1:
+            merged.add((path_changes.pop(), path))
+        elif not os.path.exists(path):
+            # Whatever happened, it's gone now
+            merged.add((Change.deleted, path))
+        elif Change.deleted in path_changes:
+            merged.add((Change.modified, path))
+        else:
+            # Created and then written to
+            merged.add((Change.added, path))
+
+    return merged
+
+
 class ChangeResult:
     def __init__(
         self, *, reload: bool = False, rebuild: bool = False, rebuild_paths: list = []
@@ -27,6 +77,91 @@ class ChangeResult:
         self.rebuild_paths = rebuild_paths
 
 
+class StepRunner:
+    """
+    Run build steps in the background, so they don't hold up other changes
+    (or each other). A step that is already running when its inputs change
+    again is run one more time after it finishes, instead of once per change.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._rerun: Set[str] = set()
+
+    def run(self, step: BuildStep, matched_pattern: str) -> None:
+        key = step.run or ""
+
+        with self._lock:
+            if key in self._threads:
+                self._rerun.add(key)
+                return
+
+            thread = threading.Thread(
+                target=self._run_step, args=(key, step, matched_pattern), daemon=True
+            )
+            self._threads[key] = thread
+            thread.start()
+
+    def _run_step(self, key: str, step: BuildStep, matched_pattern: str) -> None:
+        while True:
+            click.secho(
+                f"Running step for matching {matched_pattern}",
+                bold=True,
+                color=True,
+            )
+            try:
+                result = step.run_process(check=False)
+                failed = result.returncode != 0
+            except Exception as e:
+                logger.debug("Error running step %s", step.run, exc_info=e)
+                failed = True
+
+            if failed:
+                click.secho(
+                    "There was an error running a user command.",
+                    fg="red",
+                    color=True,
+                )
+
+            with self._lock:
+                if key in self._rerun:
+                    self._rerun.discard(key)
+                    continue
+
+                del self._threads[key]
+                return
+
+    def wait(self) -> None:
+        """Wait for every running step (including re-runs) to finish"""
+        while True:
+            with self._lock:
+                threads = list(self._threads.values())
+
+            if not threads:
+                return
+
+            for thread in threads:
+                thread.join()
+
+
+class WatchFilter(DefaultFilter):
+    """
+    Only let through the events that the watcher cares about,
+    before they're batched up and handed to it.
+    """
+
+    ignore_dirs = (*DefaultFilter.ignore_dirs, ".cache", "env")
+    ignore_entity_patterns = (*DefaultFilter.ignore_entity_patterns, r"\.crdownload$")
+
+    def __init__(self, watcher: "Watcher") -> None:
+        self.watcher = watcher
+        super().__init__(ignore_paths=[watcher.combine.config.cache_path])
+
+    def __call__(self, change: Change, path: str) -> bool:
+        return super().__call__(change, path) and self.watcher.is_watched_path(path)
+
+
 class Watcher:
     def __init__(
         self,
@@ -39,38 +174,207 @@ class Watcher:
         self.debug = debug
         self.combine = combine
         self.repaint = repaint
+        self.step_matcher = StepWatchMatcher(self.combine.config.steps)
+        self.step_runner = StepRunner()
+
+        # Set when combine.yml changes, since the paths to watch can change with it
+        # (or when any file that is watched on its own changes)
+        self._rewatch = False
+        self._watched_files: Set[str] = set()
+
+        # Builds run in the background, so new changes can interrupt them
+        self._build_thread: Optional[threading.Thread] = None
+        self._build_cancel = threading.Event()
+        self._build_paths: List[str] = []
+        self._build_finished = False
 
     def watch(self) -> None:
-        for changes in watch(self.path, recursive=True, debug=self.debug):
-            change_results = [
-                self.process_change(change, path) for change, path in changes
-            ]
-
-            reload = False
-            rebuild = False
-            rebuild_paths = []
-            rebuild_all_paths = False
-
-            for change_result in change_results:
-                if not change_result:
-                    continue
+        try:
+            while True:
+                self._rewatch = False
+
+                for changes in watch(
+                    *self.get_watch_paths(),
+                    watch_filter=WatchFilter(self),
+                    recursive=True,
+                    debug=self.debug,
+                ):
+                    self.process_changes(changes)
+                    if self._rewatch:
+                        break
+
+                if not self._rewatch:
+                    return
+        finally:
+            self.cancel_build()
+
+    def get_watch_paths(self) -> List[str]:
+        """
+        The content paths, combine.yml, and whatever the step patterns could match
+        (instead of the entire project, including the output).
+
+        Single files are watched on their own. Their watch is lost when an editor
+        saves by replacing the file, so any change to one restarts the watch.
+        """
+        paths = [os.path.abspath(self.combine.config_path)]
+
+        for content_path in self.combine.config.content_paths:
+            if content_path != BASE_CONTENT_PATH:
+                paths.append(content_path)
+
+        for step in self.combine.config.steps:
+            for pattern in step.watch_patterns:
+                paths.append(get_watch_pattern_root(pattern, self.path))
+
+        if self.repaint:
+            # Steps can write CSS and JS straight to the output
+            paths.append(self.combine.output_path)
+
+        watch_paths: List[str] = []
+
+        # Shortest first, so anything inside of another path can be skipped
+        for path in sorted(set(paths), key=len):
+            if not os.path.exists(path):
+                continue
+
+            if not any(os.path.commonpath([path, x]) == x for x in watch_paths):
+                watch_paths.append(path)
+
+        self._watched_files = set(x for x in watch_paths if os.path.isfile(x))
+
+        return watch_paths
+
+    def is_watched_path(self, path: str) -> bool:
+        if self.combine.is_in_output_path(path):
+            _, ext = os.path.splitext(path)
+            return bool(self.repaint) and ext in (".css", ".js")
 
-                if change_result.reload:
-                    reload = True
+        path = os.path.abspath(path)
 
-                if change_result.rebuild:
-                    rebuild = True
+        if path == os.path.abspath(self.combine.config_path):
+            return True
+
+        if self.combine.content_relative_path(path):
+            return True
+
+        return bool(self.step_matcher.match(path))
+
+    def process_changes(self, changes: Set[Tuple[Change, str]]) -> None:
+        if any(os.path.abspath(path) in self._watched_files for _, path in changes):
+            # The file could have been replaced, so watch it again
+            self._rewatch = True
+
+        changes = merge_changes(changes)
+
+        # Each matching step runs once for the whole batch (in the background)
+        matched_steps: Dict[BuildStep, str] = {}
+        for _, path in changes:
+            if self.combine.is_in_output_path(path):
+                # Steps (and builds) write here, so they'd keep triggering themselves
+                continue
+
+            for step, matched_pattern in self.step_matcher.match(path):
+                matched_steps.setdefault(step, matched_pattern)
+
+        for step, matched_pattern in matched_steps.items():
+            self.step_runner.run(step, matched_pattern)
+
+        build_changes = set(x for x in changes if self.affects_build(x[1]))
+
+        for change, path in changes - build_changes:
+            # Repainting output (or nothing), which the current build can keep going through
+            self.process_change(change, path)
+
+        if not build_changes:
+            return
+
+        # The changes can affect the files being built (and Combine itself),
+        # so stop the current build first and redo whatever it didn't finish
+        unfinished_paths = self.cancel_build()
+
+        change_results = [
+            self.process_change(change, path) for change, path in build_changes
+        ]
 
-                if change_result.rebuild_paths:
-                    rebuild_paths.extend(change_result.rebuild_paths)
-                else:
-                    rebuild_all_paths = True
+        reload = False
+        rebuild = False
+        rebuild_paths = []
+        rebuild_all_paths = False
 
-            if reload:
-                self.reload_combine()
+        for change_result in change_results:
+            if not change_result:
+                continue
 
-            if rebuild:
-                self.rebuild_site([] if rebuild_all_paths else list(set(rebuild_paths)))
+            if change_result.reload:
+                reload = True
+
+            if not change_result.rebuild:
+                continue
+
+            rebuild = True
+
+            if change_result.rebuild_paths:
+                rebuild_paths.extend(change_result.rebuild_paths)
+            else:
+                rebuild_all_paths = True
+
+        if unfinished_paths is not None:
+            click.secho("--> Restarting the build", bold=True, color=True)
+            rebuild = True
+
+            if unfinished_paths:
+                rebuild_paths.extend(unfinished_paths)
+            else:
+                rebuild_all_paths = True
+
+        if reload:
+            self.reload_combine()
+            self.step_matcher = StepWatchMatcher(self.combine.config.steps)
+            self._rewatch = True
+
+        if rebuild:
+            self.start_build([] if rebuild_all_paths else sorted(set(rebuild_paths)))
+
+    def affects_build(self, path: str) -> bool:
+        """Whether a change to this path can mean rebuilding (or reloading) the site"""
+        if self.combine.is_in_output_path(path):
+            return False
+
+        path = os.path.abspath(path)
+
+        if path == os.path.abspath(self.combine.config_path):
+            return True
+
+        return bool(self.combine.content_relative_path(path))
+
+    def start_build(self, only_paths: List[str] = []) -> None:
+        self._build_cancel = threading.Event()
+        self._build_paths = only_paths
+        self._build_finished = False
+        self._build_thread = threading.Thread(target=self._run_build, daemon=True)
+        self._build_thread.start()
+
+    def _run_build(self) -> None:
+        self._build_finished = self.rebuild_site(
+            self._build_paths, cancel=self._build_cancel
+        )
+
+    def cancel_build(self) -> Optional[List[str]]:
+        """
+        Stop the current build (at the next file) and wait for it.
+        Returns the paths it was building if it didn't finish, or None.
+        """
+        if not self._build_thread:
+            return None
+
+        self._build_cancel.set()
+        self._build_thread.join()
+        self._build_thread = None
+
+        if self._build_finished:
+            return None
+
+        return self._build_paths
 
     def reload_combine(self) -> None:
         click.secho("Reloading combine", bold=True, color=True)
@@ -80,7 +384,10 @@ class Watcher:
             logger.error("Error reloading", exc_info=e)
             click.secho("There was an error! See output above.", fg="red", color=True)
 
-    def rebuild_site(self, only_paths: List[str] = []) -> None:
+    def rebuild_site(
+        self, only_paths: List[str] = [], cancel: Optional[threading.Event] = None
+    ) -> bool:
+        """Build the site, returning False if it was cancelled"""
         if len(only_paths) == 1:
             click.secho(f"--> Rebuilding {only_paths[0]}", bold=True, color=True)
         elif len(only_paths) > 1:
@@ -91,43 +398,24 @@ class Watcher:
             click.secho("--> Rebuilding entire site", bold=True, color=True)
 
         try:
-            self.combine.build(only_paths)
+            # Workers would each load the whole site again, and can't be forked
+            # safely from the threads in here, so watch mode builds are serial
+            self.combine.build(only_paths, jobs=1, cancel=cancel)
             if self.repaint:
                 self.repaint.reload()
+        except BuildCancelled:
+            return False
         except BuildError:
             click.secho("Build error (see above)", fg="red", color=True)
         except Exception as e:
             logger.error("Error building", exc_info=e)
             click.secho("There was an error! See output above.", fg="red", color=True)
 
-    def should_ignore_path(self, path: str) -> bool:
-        # Most of these are filtered already by watch
-        ignore_dirs = (
-            "node_modules",
-            ".cache",
-            ".venv",
-            "env",
-            ".git",
-        )
-
-        for p in os.path.abspath(path).split(os.sep):
-            if p in ignore_dirs:
-                return True
-
-        ignore_extensions = (".crdownload",)
-
-        if os.path.splitext(path)[1] in ignore_extensions:
-            return True
-
-        return False
+        return True
 
     def process_change(self, change: Change, path: str) -> Optional[ChangeResult]:
         logger.debug("Event: %s %s", change.name, path)
 
-        if self.should_ignore_path(path):
-            logger.debug("Ignoring path: %s", path)
-            return None
-
         if self.combine.is_in_output_path(path):
             _, ext = os.path.splitext(path)
             if ext in (".css", ".js") and self.repaint:
@@ -138,22 +426,6 @@ class Watcher:
                 logger.debug("Ignoring output path: %s", path)
             return None
 
-        for step in self.combine.config.steps:
-            matched_pattern = step.watch_pattern_match(path)
-            if matched_pattern:
-                click.secho(
-                    f"Running step for matching {matched_pattern}",
-                    bold=True,
-                    color=True,
-                )
-                result = step.run_process(check=False)
-                if result.returncode != 0:
-                    click.secho(
-                        "There was an error running a user command.",
-                        fg="red",
-                        color=True,
-                    )
-
         if os.path.abspath(path) == os.path.abspath(self.combine.config_path):
             return ChangeResult(reload=True, rebuild=True)
 
@@ -168,13 +440,29 @@ class Watcher:
                     bold=True,
                     color=True,
                 )
-                return ChangeResult(reload=True, rebuild=True)
 
-            if change in (Change.added, Change.modified):
-                # Reload first, so we know about any new files
-                self.reload_combine()
+                # The outputs are removed, and only what used the files is rebuilt
+                files = self.combine.remove_path(path)
+                if not files:
+                    return None
+
+                return ChangeResult(rebuild=True, rebuild_paths=[x.path for x in files])
+
+            files = []
+
+            if change == Change.added:
+                # Only the new files (and anything that referenced them) are loaded
+                for added_file in self.combine.add_path(path):
+                    for file in self.combine.get_related_files(
+                        added_file.content_relative_path
+                    ):
+                        if file not in files:
+                            files.append(file)
 
-            files = self.combine.get_related_files(content_relative_path)
+            if not files:
+                # Modified (or added again before we saw it was gone)
+                self.combine.refresh_path(path)
+                files = self.combine.get_related_files(content_relative_path)
 
             if files and all([type(f) == IgnoredFile for f in files]):
                 return None
@@ -236,8 +524,7 @@ class HTTPHandler(SimpleHTTPRequestHandler):
             if repaint_script not in contents:
                 contents = contents.replace("</body>", repaint_script + "</body>")
 
-            with open(path, "w") as f:
-                f.write(contents)
+                write_output(path, contents)
 
     def do_GET(self) -> None:
         self.inject_repaint()
@@ -1,2 +1,8 @@
 class BuildError(Exception):
     pass
+
+
+class BuildCancelled(Exception):
+    """The build was stopped (between files) because it was cancelled"""
+
+    pass
@@ -1,12 +1,11 @@
 import os
-from shutil import copyfile
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 
 import jinja2
 from ..checks.issues import Issues
 from ..checks.file_size import FileSizeCheck
-from .utils import create_parent_directory
-from ..checks.base import Check
+from .utils import copy_output, create_parent_directory
+from ..checks.base import Check, HTMLCheck, run_checks
 
 if TYPE_CHECKING:
     from combine.core import ContentDirectory
@@ -33,6 +32,10 @@ class File:
     def _get_output_relative_path(self) -> str:
         return self.content_relative_path
 
+    def is_template(self) -> bool:
+        """Whether this file gets loaded as a Jinja template"""
+        return False
+
     def load(self, jinja_environment: jinja2.Environment) -> None:
         """Load properties that can vary depending on content of the file"""
         self.references = []
@@ -46,26 +49,22 @@ class File:
         target_path = os.path.join(output_path, self.output_relative_path)
         create_parent_directory(target_path)
 
-        if os.path.exists(target_path):
-            os.remove(target_path)
-
-        copyfile(self.path, target_path)
+        copy_output(self.path, target_path)
 
         return target_path
 
-    def check_output(self) -> Issues:
-        issues = Issues()
-
-        for check in self.get_checks():
-            for issue in check.run():
-                issues.append(issue)
-
-        if issues:
-            issues.print(f"Issues in {self.content_relative_path}")
-
-        return issues
-
-    def get_checks(self) -> List[Check]:
+    def check_output(
+        self,
+        html_parser: str = "html.parser",
+        deferred: Optional[List[HTMLCheck]] = None,
+    ) -> Issues:
+        """
+        Check the output of this file. Checks that depend on the rest of the site
+        are added to the deferred list (if given) to be finished later.
+        """
+        return run_checks(self.get_checks(html_parser=html_parser), deferred=deferred)
+
+    def get_checks(self, html_parser: str = "html.parser") -> List[Check]:
         if self.output_path:
             # Not all files have an output
             return [
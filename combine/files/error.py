@@ -3,7 +3,7 @@ import traceback
 
 import jinja2
 from .html import HTMLFile
-from .utils import create_parent_directory
+from .utils import create_parent_directory, write_output
 
 from typing import Any
 
@@ -21,23 +21,23 @@ class ErrorFile(HTMLFile):
 
         template = jinja_environment.get_template("error.template.html")
 
-        with open(target_path, "w+") as f:
-            if hasattr(self.error, "source"):
-                context_lines = "\n".join(
-                    self.error.source.splitlines()[
-                        max(self.error.lineno - 3, 0) : self.error.lineno + 3
-                    ]
-                )
-            else:
-                context_lines = ""
-
-            f.write(
-                template.render(
-                    error=self.error,
-                    relative_path=self.content_relative_path,
-                    context_lines=context_lines,
-                    excinfo=traceback.format_exc(),
-                )
+        if hasattr(self.error, "source"):
+            context_lines = "\n".join(
+                self.error.source.splitlines()[
+                    max(self.error.lineno - 3, 0) : self.error.lineno + 3
+                ]
             )
+        else:
+            context_lines = ""
+
+        write_output(
+            target_path,
+            template.render(
+                error=self.error,
+                relative_path=self.content_relative_path,
+                context_lines=context_lines,
+                excinfo=traceback.format_exc(),
+            ),
+        )
 
         return target_path
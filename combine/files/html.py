@@ -2,17 +2,26 @@ import os
 
 from bs4 import BeautifulSoup
 import jinja2
-from typing import List
+from typing import List, Optional
 
 from ..jinja.references import get_references_in_path
 from .core import File
-from .utils import create_parent_directory
+from .utils import create_parent_directory, write_output
 from ..checks.duplicate_id import DuplicateIDCheck
 from ..checks.mixed_content import MixedContentCheck
 from ..checks.img_alt import ImgAltCheck
 from ..checks.meta import MetaDescriptionCheck
 from ..checks.title import TitleCheck
 from ..checks.links import InternalLinkBrokenCheck
+from ..checks.external_links import ExternalLinkCheck
+from ..checks.page_weight import PageWeightCheck
+from ..checks.performance import (
+    FontDisplayCheck,
+    ImgDimensionsCheck,
+    ImgLazyLoadingCheck,
+    RenderBlockingScriptCheck,
+    StylesheetCountCheck,
+)
 from ..checks.open_graph import (
     OpenGraphTitleCheck,
     OpenGraphDescriptionCheck,
@@ -25,6 +34,9 @@ from ..checks.base import Check
 
 
 class HTMLFile(File):
+    # Kept from the last render so checks don't have to read it back from disk
+    rendered_html: Optional[str] = None
+
     def _get_output_relative_path(self) -> str:
         if self.name_without_extension.endswith(".keep"):
             # remove .keep.html from the end and replace with .html
@@ -35,6 +47,9 @@ class HTMLFile(File):
 
         return os.path.join(*self.root_parts, "index.html")
 
+    def is_template(self) -> bool:
+        return True
+
     def load(self, jinja_environment: jinja2.Environment) -> None:
         self.references = get_references_in_path(self.path, jinja_environment)
 
@@ -46,37 +61,65 @@ class HTMLFile(File):
 
         template = jinja_environment.get_template(self.content_relative_path)
 
-        with open(target_path, "w+") as f:
-            f.write(template.render(url=self._get_url()))
+        self._write_html(target_path, template.render(url=self._get_url()))
 
         return target_path
 
+    def _write_html(self, target_path: str, html: str) -> None:
+        write_output(target_path, html)
+
+        self.rendered_html = html
+
     def _get_url(self) -> str:
         url = "/" + self.output_relative_path
         if url.endswith("/index.html"):
             url = url[:-10]
         return url
 
-    def get_checks(self) -> List[Check]:
-        with open(self.output_path, "r") as f:
-            html_soup = BeautifulSoup(f.read(), "html.parser")
-
-            return super().get_checks() + [
-                DuplicateIDCheck(html_soup=html_soup),
-                MixedContentCheck(html_soup=html_soup),
-                ImgAltCheck(html_soup=html_soup),
-                MetaDescriptionCheck(html_soup=html_soup),
-                TitleCheck(html_soup=html_soup),
-                OpenGraphTitleCheck(html_soup=html_soup),
-                OpenGraphDescriptionCheck(html_soup=html_soup),
-                OpenGraphTypeCheck(html_soup=html_soup),
-                OpenGraphURLCheck(html_soup=html_soup),
-                OpenGraphImageCheck(html_soup=html_soup),
-                OpenGraphSiteNameCheck(html_soup=html_soup),
-                InternalLinkBrokenCheck(
-                    html_soup=html_soup,
-                    file_path=self.output_path,
-                    # reverse engineer the output dir for now
-                    output_dir=self.output_path[: -len(self.output_relative_path)],
-                ),
-            ]
+    def get_checks(self, html_parser: str = "html.parser") -> List[Check]:
+        html = self.rendered_html
+
+        if html is None:
+            # Not rendered by this process (unchanged or rendered in a worker)
+            with open(self.output_path, "r") as f:
+                html = f.read()
+
+        html_soup = BeautifulSoup(html, html_parser)
+
+        duplicate_id_check = DuplicateIDCheck(html_soup=html_soup)
+
+        return super().get_checks(html_parser=html_parser) + [
+            duplicate_id_check,
+            MixedContentCheck(html_soup=html_soup),
+            ImgAltCheck(html_soup=html_soup),
+            MetaDescriptionCheck(html_soup=html_soup),
+            TitleCheck(html_soup=html_soup),
+            OpenGraphTitleCheck(html_soup=html_soup),
+            OpenGraphDescriptionCheck(html_soup=html_soup),
+            OpenGraphTypeCheck(html_soup=html_soup),
+            OpenGraphURLCheck(html_soup=html_soup),
+            OpenGraphImageCheck(html_soup=html_soup),
+            OpenGraphSiteNameCheck(html_soup=html_soup),
+            InternalLinkBrokenCheck(
+                html_soup=html_soup,
+                file_path=self.output_path,
+                # reverse engineer the output dir for now
+                output_dir=self.output_path[: -len(self.output_relative_path)],
+                ids_check=duplicate_id_check,
+            ),
+            ExternalLinkCheck(html_soup=html_soup),
+            RenderBlockingScriptCheck(html_soup=html_soup),
+            ImgDimensionsCheck(html_soup=html_soup),
+            ImgLazyLoadingCheck(html_soup=html_soup),
+            StylesheetCountCheck(html_soup=html_soup),
+            FontDisplayCheck(
+                html_soup=html_soup,
+                file_path=self.output_path,
+                output_dir=self.output_path[: -len(self.output_relative_path)],
+            ),
+            PageWeightCheck(
+                html_soup=html_soup,
+                file_path=self.output_path,
+                output_dir=self.output_path[: -len(self.output_relative_path)],
+            ),
+        ]
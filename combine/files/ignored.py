@@ -3,6 +3,10 @@ import jinja2
 
 
 class IgnoredFile(File):
+    def is_template(self) -> bool:
+        # Partials are ignored files that get included in other templates
+        return self.extension == ".html"
+
     def _get_output_relative_path(self) -> str:
         return ""
 
@@ -1,5 +1,7 @@
 import jinja2
 import os
+from collections import OrderedDict
+from typing import Tuple
 
 import frontmatter
 
@@ -8,7 +10,42 @@ from .html import HTMLFile
 from .utils import create_parent_directory
 
 
+# Parsed (metadata, content) by path, reused until the file's mtime or size changes.
+# The dev server runs for a long time, so only the most recently used are kept.
+MAX_FRONTMATTER_CACHE_ITEMS = 1024
+_frontmatter_cache: "OrderedDict[str, Tuple[Tuple[int, int], dict, str]]" = (
+    OrderedDict()
+)
+
+
+def load_frontmatter(path: str) -> Tuple[dict, str]:
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _frontmatter_cache.get(path)
+    if cached and cached[0] == key:
+        _frontmatter_cache.move_to_end(path)
+        return cached[1], cached[2]
+
+    post = frontmatter.load(path)
+    _frontmatter_cache[path] = (key, post.metadata, post.content)
+    _frontmatter_cache.move_to_end(path)
+    if len(_frontmatter_cache) > MAX_FRONTMATTER_CACHE_ITEMS:
+        _frontmatter_cache.popitem(last=False)
+
+    return post.metadata, post.content
+
+
+def forget_frontmatter(path: str) -> None:
+    """Drop the parsed frontmatter of a file that changed or was deleted"""
+    _frontmatter_cache.pop(path, None)
+
+
 class MarkdownFile(HTMLFile):
+    def is_template(self) -> bool:
+        # The content is only passed to a template
+        return False
+
     def _get_output_relative_path(self) -> str:
         if self.name_without_extension.endswith(".keep"):
             # remove .keep.md from the end and replace with .html
@@ -31,11 +68,12 @@ class MarkdownFile(HTMLFile):
             self.references = []
 
     def _get_variables(self) -> dict:
-        post = frontmatter.load(self.path)
+        metadata, content = load_frontmatter(self.path)
 
-        variables = post.metadata
+        # Copy so the cached metadata isn't modified
+        variables = dict(metadata)
         variables["url"] = self._get_url()
-        variables["content"] = post.content
+        variables["content"] = content
 
         return variables
 
@@ -56,7 +94,6 @@ class MarkdownFile(HTMLFile):
         target_path = os.path.join(output_path, self.output_relative_path)
         create_parent_directory(target_path)
 
-        with open(target_path, "w+") as f:
-            f.write(template.render(**variables))
+        self._write_html(target_path, template.render(**variables))
 
         return target_path
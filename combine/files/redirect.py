@@ -6,6 +6,9 @@ from .utils import create_parent_directory
 
 
 class RedirectFile(HTMLFile):
+    def is_template(self) -> bool:
+        return False
+
     def _render_to_output(
         self, output_path: str, jinja_environment: jinja2.Environment
     ) -> str:
@@ -15,7 +18,6 @@ class RedirectFile(HTMLFile):
         redirect_to = open(self.path, "r").read().strip()
 
         template = jinja_environment.get_template("redirect.template.html")
-        with open(target_path, "w+") as f:
-            f.write(template.render(redirect_url=redirect_to))
+        self._write_html(target_path, template.render(redirect_url=redirect_to))
 
         return target_path
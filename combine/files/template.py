@@ -4,6 +4,9 @@ from .ignored import IgnoredFile
 
 
 class TemplateFile(IgnoredFile):
+    def is_template(self) -> bool:
+        return True
+
     def load(self, jinja_environment: jinja2.Environment) -> None:
         self.references = get_references_in_path(self.path, jinja_environment)
 
@@ -1,7 +1,43 @@
 import os
+import uuid
+from shutil import copyfile
 
 
 def create_parent_directory(path: str) -> None:
     path_dir = os.path.dirname(path)
     if not os.path.exists(path_dir):
         os.makedirs(path_dir)
+
+
+def _get_temporary_path(path: str) -> str:
+    # Next to the final path, so the replace can't cross filesystems
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+
+
+def write_output(path: str, content: str) -> None:
+    """
+    Replace an output file all at once, so an interrupted build
+    (or the dev server) never leaves or sees half of one.
+    """
+    tmp_path = _get_temporary_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_output(source_path: str, path: str) -> None:
+    """Like write_output, for files that are copied as-is"""
+    tmp_path = _get_temporary_path(path)
+    try:
+        copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
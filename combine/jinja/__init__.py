@@ -1,10 +1,16 @@
 from .code import CodeHighlightExtension
 from .markdown import MarkdownExtension, markdown_filter
 from .include_raw import IncludeRawExtension
+from .fragment_cache import FragmentCacheExtension
 from .urls import absolute_url
 
 
-default_extensions = [CodeHighlightExtension, MarkdownExtension, IncludeRawExtension]
+default_extensions = [
+    CodeHighlightExtension,
+    MarkdownExtension,
+    IncludeRawExtension,
+    FragmentCacheExtension,
+]
 default_filters = {
     "absolute_url": absolute_url,
     "markdown": markdown_filter,
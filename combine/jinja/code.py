@@ -3,9 +3,7 @@ from jinja2 import nodes
 from jinja2.parser import Parser
 from jinja2.ext import Extension
 
-from pygments import highlight
-from pygments.lexers import get_lexer_by_name, guess_lexer
-from pygments.formatters import HtmlFormatter
+from .highlight import highlight_code
 
 
 class CodeHighlightExtension(Extension):
@@ -36,11 +34,6 @@ class CodeHighlightExtension(Extension):
         lines = [x[len_to_trim:] for x in lines]
         code = "\n".join(lines)
 
-        if language:
-            lexer = get_lexer_by_name(language, stripall=True)
-        else:
-            lexer = guess_lexer(code)
-
-        highlighted = highlight(code, lexer, HtmlFormatter())
-
-        return highlighted
+        return highlight_code(
+            code, language, cache=getattr(self.environment, "render_cache", None)
+        )
@@ -0,0 +1,136 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from jinja2 import Environment, TemplateNotFound, nodes
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+from markupsafe import Markup
+
+from ..manifest import hash_data
+from .references import DYNAMIC_REFERENCE, get_reference_index
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Render a block once and reuse it, for output that is the same on every page.
+
+        {% cache "sidebar" %}...{% endcache %}
+        {% cache "nav", page.url %}...{% endcache %}
+        {% cache "footer", persist=true %}...{% endcache %}
+
+    Fragments are kept for the length of a build, by key and any "vary on" values.
+    With persist, they're also saved in the render cache for the next build,
+    until the variables or any of the templates involved change.
+    Templates that include others by variable can't be persisted.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment: Environment) -> None:
+        super().__init__(environment)
+        self._fragments: Dict[str, str] = {}
+        self._template_hashes: Dict[str, Optional[str]] = {}
+        environment.extend(fragment_cache=self)
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+
+        args: List[nodes.Expr] = [parser.parse_expression()]
+        persist: nodes.Expr = nodes.Const(False)
+
+        while parser.stream.skip_if("comma"):
+            if (
+                parser.stream.current.test("name:persist")
+                and parser.stream.look().type == "assign"
+            ):
+                next(parser.stream)
+                next(parser.stream)
+                persist = parser.parse_expression()
+            else:
+                args.append(parser.parse_expression())
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+
+        return nodes.CallBlock(
+            self.call_method(
+                "_cache_support",
+                [nodes.Const(parser.name), nodes.List(args), persist],
+            ),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    def _cache_support(
+        self,
+        template_name: Optional[str],
+        key: List[Any],
+        persist: bool,
+        caller: Callable,
+    ) -> str:
+        fragment_key = hash_data(key)
+
+        if fragment_key in self._fragments:
+            return Markup(self._fragments[fragment_key])
+
+        render_cache = getattr(self.environment, "render_cache", None)
+        persist_key = None
+
+        template_hash = None
+        if persist and render_cache and template_name:
+            template_hash = self.get_template_hash(template_name)
+
+        if template_hash and render_cache:
+            persist_key = render_cache.key(
+                fragment_key,
+                getattr(self.environment, "variables_hash", ""),
+                template_hash,
+            )
+            cached = render_cache.get("fragments", persist_key)
+            if cached is not None:
+                self._fragments[fragment_key] = cached
+                return Markup(cached)
+
+        rendered = caller()
+        self._fragments[fragment_key] = rendered
+
+        if persist_key and render_cache:
+            render_cache.set("fragments", persist_key, rendered)
+
+        return rendered
+
+    def get_template_hash(self, template_name: str) -> Optional[str]:
+        """
+        Hash the sources of a template and everything it references
+        (or None if it has references that can't be known ahead of time)
+        """
+        if template_name not in self._template_hashes:
+            reference_index = get_reference_index(self.environment)
+            names = [template_name]
+
+            path = reference_index.get_path_for_reference(template_name)
+            if path:
+                names.extend(sorted(reference_index.get_references_in_path(path)))
+
+            sources: List[Optional[str]] = []
+            for name in names:
+                if name == DYNAMIC_REFERENCE:
+                    self._template_hashes[template_name] = None
+                    break
+
+                try:
+                    source, _, _ = self.environment.loader.get_source(  # type: ignore
+                        self.environment, name
+                    )
+                except TemplateNotFound:
+                    # Like {% include ... ignore missing %}, which is fine until it exists
+                    source = None
+                sources.append(source)
+            else:
+                self._template_hashes[template_name] = hash_data(sources)
+
+        return self._template_hashes[template_name]
+
+    def clear(self) -> None:
+        """Forget the fragments from the last build"""
+        self._fragments = {}
+        self._template_hashes = {}
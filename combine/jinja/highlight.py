@@ -0,0 +1,126 @@
+import types
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional
+
+import markdown
+import pygments
+from markdown.extensions.codehilite import CodeHilite, HiliteTreeprocessor
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from pygments.formatters import HtmlFormatter
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name, guess_lexer
+
+from ..cache import RenderCache
+
+
+# Set while rendering Markdown, since CodeHilite has no way to reach the environment
+_markdown_cache: ContextVar[Optional[RenderCache]] = ContextVar(
+    "markdown_highlight_cache", default=None
+)
+
+
+@lru_cache(maxsize=None)
+def get_lexer(language: str) -> Lexer:
+    return get_lexer_by_name(language, stripall=True)
+
+
+@lru_cache(maxsize=None)
+def get_formatter() -> HtmlFormatter:
+    return HtmlFormatter()
+
+
+def highlight_code(
+    code: str, language: str, cache: Optional[RenderCache] = None
+) -> str:
+    """Highlight code for the {% code %} tag, guessing the language if there isn't one"""
+    if cache:
+        key = cache.key(pygments.__version__, "code", language, code)
+        cached = cache.get("highlight", key)
+        if cached is not None:
+            return cached
+
+    lexer = get_lexer(language) if language else guess_lexer(code)
+    highlighted = pygments.highlight(code, lexer, get_formatter())
+
+    if cache:
+        cache.set("highlight", key, highlighted)
+
+    return highlighted
+
+
+@contextmanager
+def markdown_highlight_cache(cache: Optional[RenderCache]) -> Iterator[None]:
+    token = _markdown_cache.set(cache)
+    try:
+        yield
+    finally:
+        _markdown_cache.reset(token)
+
+
+class CachedCodeHilite(CodeHilite):
+    """
+    CodeHilite that checks the highlight cache before lexing (or guessing) the code.
+    Used by both the codehilite and fenced_code processors (see HighlightCacheExtension).
+    """
+
+    def hilite(self, shebang: bool = True) -> str:
+        cache = _markdown_cache.get()
+        if not cache:
+            return super().hilite(shebang=shebang)
+
+        # The source, language and every option (css class, style, etc.)
+        # are attributes, which also keeps this working across Markdown versions
+        attrs = sorted((name, repr(value)) for name, value in vars(self).items())
+        key = cache.key(pygments.__version__, "markdown", repr(shebang), repr(attrs))
+        cached = cache.get("highlight", key)
+        if cached is not None:
+            return cached
+
+        highlighted = super().hilite(shebang=shebang)
+        cache.set("highlight", key, highlighted)
+        return highlighted
+
+
+def with_cached_code_hilite(function: Callable) -> Callable:
+    """
+    A copy of a Python-Markdown processor method that highlights with CachedCodeHilite.
+    The method looks up CodeHilite in its module, which is left alone for anyone else
+    using Markdown in the same process.
+    """
+    return types.FunctionType(
+        function.__code__,
+        {**function.__globals__, "CodeHilite": CachedCodeHilite},
+        function.__name__,
+        function.__defaults__,
+        function.__closure__,
+    )
+
+
+class CachedFencedBlockPreprocessor(FencedBlockPreprocessor):
+    run = with_cached_code_hilite(FencedBlockPreprocessor.run)
+
+
+class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+    run = with_cached_code_hilite(HiliteTreeprocessor.run)
+
+
+class HighlightCacheExtension(markdown.Extension):
+    """
+    Puts code blocks through the highlight cache, by replacing the processors
+    of the fenced_code and codehilite extensions (which have to come first).
+    """
+
+    def extendMarkdown(self, md: markdown.Markdown) -> None:
+        fenced = md.preprocessors["fenced_code_block"]
+        md.preprocessors.register(
+            CachedFencedBlockPreprocessor(md, fenced.config),  # type: ignore
+            "fenced_code_block",
+            25,
+        )
+
+        hiliter: Any = md.treeprocessors["hilite"]
+        cached_hiliter = CachedHiliteTreeprocessor(md)
+        cached_hiliter.config = hiliter.config
+        md.treeprocessors.register(cached_hiliter, "hilite", 30)
@@ -1,3 +1,5 @@
+from typing import Iterator, Optional
+
 from jinja2 import nodes, BaseLoader
 from jinja2.parser import Parser
 from jinja2.ext import Extension
@@ -16,3 +18,17 @@ class IncludeRawExtension(Extension):
     def _render(self, filename: str) -> Markup:
         source = self.environment.loader.get_source(self.environment, filename)  # type: ignore
         return Markup(source[0])
+
+
+def find_raw_includes(ast: nodes.Template) -> Iterator[Optional[str]]:
+    """The files included with include_raw (None for the ones that aren't constants)"""
+    for call in ast.find_all(nodes.Call):
+        if (
+            isinstance(call.node, nodes.ExtensionAttribute)
+            and call.node.identifier == IncludeRawExtension.identifier
+        ):
+            arg = call.args[0]
+            if isinstance(arg, nodes.Const) and isinstance(arg.value, str):
+                yield arg.value
+            else:
+                yield None
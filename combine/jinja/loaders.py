@@ -0,0 +1,156 @@
+import json
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+import jinja2
+from jinja2.loaders import split_template_path
+from jinja2.utils import internalcode
+
+from ..manifest import hash_bytes
+
+if TYPE_CHECKING:
+    from ..core import ContentDirectory
+
+
+class ContentLoader(jinja2.BaseLoader):
+    """
+    Load templates using the files already found in the content directories,
+    instead of checking the filesystem of each content path for every lookup.
+
+    Sources are kept in memory until they are invalidated,
+    so templates never need to be checked for changes on disk.
+    """
+
+    def __init__(self, content_directories: List["ContentDirectory"]) -> None:
+        self.content_directories = content_directories
+        self._paths: Dict[str, str] = {}
+        self._sources: Dict[str, str] = {}
+        self.index()
+
+    def index(self) -> None:
+        """Map every template name to the file that wins across the content directories"""
+        self._paths = {}
+
+        # Earlier content directories take priority
+        for content_directory in reversed(self.content_directories):
+            for file in content_directory.files:
+                name = self.get_template_name(file.content_relative_path)
+                self._paths[name] = file.path
+
+    def get_template_name(self, content_relative_path: str) -> str:
+        return "/".join(split_template_path(content_relative_path.replace(os.sep, "/")))
+
+    def get_path(self, template: str) -> Optional[str]:
+        try:
+            name = self.get_template_name(template)
+        except jinja2.TemplateNotFound:
+            return None
+
+        return self._paths.get(name)
+
+    def get_source(
+        self, environment: jinja2.Environment, template: str
+    ) -> Tuple[str, Optional[str], Optional[Callable[[], bool]]]:
+        path = self.get_path(template)
+        if not path:
+            raise jinja2.TemplateNotFound(template)
+
+        if path not in self._sources:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._sources[path] = f.read()
+            except FileNotFoundError:
+                raise jinja2.TemplateNotFound(template)
+
+        source = self._sources[path]
+
+        def uptodate() -> bool:
+            return self._sources.get(path) is source
+
+        return source, path, uptodate
+
+    def list_templates(self) -> List[str]:
+        return sorted(self._paths.keys())
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget the source of a file that changed (or all of them)"""
+        if path:
+            self._sources.pop(path, None)
+        else:
+            self._sources = {}
+
+
+class PrecompiledLoader(jinja2.BaseLoader):
+    """
+    Load templates from the Python modules written by `combine compile`.
+
+    Template sources (for include_raw, references, etc.) still come from the
+    regular loader, which is also used for anything that wasn't compiled
+    or has changed since it was.
+    """
+
+    index_filename = "templates.json"
+
+    def __init__(self, path: str, source_loader: jinja2.BaseLoader) -> None:
+        self.path = path
+        self.source_loader = source_loader
+        self.module_loader = jinja2.ModuleLoader(path)
+
+        index_path = os.path.join(path, self.index_filename)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                # Template name -> the source path and hash it was compiled from
+                self.templates: Dict[str, Dict[str, str]] = json.load(f)
+        else:
+            self.templates = {}
+
+    def get_source(
+        self, environment: jinja2.Environment, template: str
+    ) -> Tuple[str, Optional[str], Optional[Callable[[], bool]]]:
+        return self.source_loader.get_source(environment, template)
+
+    def list_templates(self) -> List[str]:
+        return self.source_loader.list_templates()
+
+    @internalcode
+    def load(
+        self,
+        environment: jinja2.Environment,
+        name: str,
+        globals: Optional[MutableMapping[str, Any]] = None,
+    ) -> jinja2.Template:
+        compiled = self.templates.get(name)
+
+        if not compiled or not self.is_compiled_source(
+            environment, name, compiled["hash"]
+        ):
+            return self.source_loader.load(environment, name, globals)
+
+        template = self.module_loader.load(environment, name, globals)
+        # Point back to the source instead of the compiled module
+        template.filename = compiled["path"]
+        return template
+
+    def is_compiled_source(
+        self, environment: jinja2.Environment, name: str, source_hash: str
+    ) -> bool:
+        """Whether the template source is the same as when it was compiled"""
+        try:
+            source, _, _ = self.source_loader.get_source(environment, name)
+        except jinja2.TemplateNotFound:
+            return False
+
+        return hash_source(source) == source_hash
+
+
+def hash_source(source: str) -> str:
+    return hash_bytes(source.encode("utf-8"))
@@ -1,12 +1,18 @@
-from typing import Any, Callable
+import threading
+from typing import Callable, Optional
 from jinja2 import nodes, pass_context
 from jinja2.parser import Parser
 from jinja2.ext import Extension
+from jinja2.runtime import Context
 from markupsafe import Markup
 
 import markdown
+import pygments
 from markdown.extensions.codehilite import CodeHiliteExtension
 
+from ..cache import RenderCache
+from .highlight import HighlightCacheExtension, markdown_highlight_cache
+
 
 class MarkdownExtension(Extension):
     tags = set(["markdown"])
@@ -24,23 +30,65 @@ class MarkdownExtension(Extension):
         # jinja will have escaped by default, so we want to unescape
         # for now and leave that to markdown rendering
         markdown_content = Markup(markdown_content).unescape()
-        return markdown_to_html(markdown_content)
+        return markdown_to_html(
+            markdown_content, cache=getattr(self.environment, "render_cache", None)
+        )
 
 
 @pass_context
-def markdown_filter(ctx: dict, value: str) -> Markup:
-    html_content = markdown_to_html(value)
+def markdown_filter(ctx: Context, value: str) -> Markup:
+    html_content = markdown_to_html(
+        value, cache=getattr(ctx.environment, "render_cache", None)
+    )
     return Markup(html_content)
 
 
-def markdown_to_html(markdown_content: str) -> str:
-    html_content = markdown.markdown(
-        markdown_content,
-        extensions=[
-            "markdown.extensions.fenced_code",
-            CodeHiliteExtension(css_class="highlight"),
-            "markdown.extensions.tables",
-            "markdown.extensions.toc",
-        ],
-    )
+def get_markdown_extensions() -> list:
+    return [
+        "markdown.extensions.fenced_code",
+        CodeHiliteExtension(css_class="highlight"),
+        "markdown.extensions.tables",
+        "markdown.extensions.toc",
+        # Puts every code block through the highlight cache
+        HighlightCacheExtension(),
+    ]
+
+
+# Anything that changes the HTML for the same Markdown needs to be in the cache key
+MARKDOWN_CACHE_VERSION = "|".join(
+    [
+        markdown.__version__,
+        pygments.__version__,
+        "fenced_code,codehilite(css_class=highlight),tables,toc",
+    ]
+)
+
+# Building a Markdown instance (and its extensions) is relatively expensive,
+# so each thread keeps one around and resets it between documents
+_converters = threading.local()
+
+
+def get_markdown_converter() -> markdown.Markdown:
+    if not hasattr(_converters, "markdown"):
+        _converters.markdown = markdown.Markdown(extensions=get_markdown_extensions())
+    return _converters.markdown
+
+
+def markdown_to_html(markdown_content: str, cache: Optional[RenderCache] = None) -> str:
+    if cache:
+        key = cache.key(MARKDOWN_CACHE_VERSION, markdown_content)
+        cached = cache.get("markdown", key)
+        if cached is not None:
+            return cached
+
+    converter = get_markdown_converter()
+    try:
+        with markdown_highlight_cache(cache):
+            html_content = converter.convert(markdown_content)
+    finally:
+        converter.reset()
+
+    if cache:
+        cache.set("markdown", key, html_content)
+
     return html_content
@@ -1,33 +1,106 @@
-from typing import List, Optional
-from jinja2 import meta, Environment
+from itertools import chain
+from typing import Dict, List, Optional, Set
+from jinja2 import meta, Environment, TemplateNotFound
 
+from .include_raw import find_raw_includes
 
-def get_references_in_path(path: str, jinja_env: Environment) -> List[str]:
-    """Get all (recursive) references that go into this file"""
 
-    with open(path, "r") as f:
-        ast = jinja_env.parse(f.read())
+# Stands in for references that aren't known until the template is rendered
+# (like {% include some_variable %}), so files that have one are always rendered
+DYNAMIC_REFERENCE = "<dynamic>"
 
-    these_references = list(meta.find_referenced_templates(ast))
 
-    references = set()
+class ReferenceIndex:
+    """
+    Memoized template references for a Jinja environment,
+    so each template is only read and parsed once no matter how many files use it.
+    """
+
+    def __init__(self, jinja_env: Environment) -> None:
+        self.jinja_env = jinja_env
+        self._direct_references: Dict[str, List[str]] = {}
+        self._references: Dict[str, Set[str]] = {}
+        self._reference_paths: Dict[str, Optional[str]] = {}
+
+    def get_references_in_path(self, path: str) -> List[str]:
+        """Get all (recursive) references that go into this file"""
+        return list(self._get_references(path, set()))
+
+    def _get_references(self, path: str, parents: Set[str]) -> Set[str]:
+        if path in self._references:
+            return self._references[path]
+
+        references: Set[str] = set()
+
+        for ref in self.get_direct_references(path):
+            if ref in references:
+                continue
 
-    for ref in these_references:
-        if ref in references or not ref:
-            continue
-        else:
             references.add(ref)
-            reference_path = get_path_for_reference(ref, jinja_env)
-            if reference_path:
-                references |= set(
-                    get_references_in_path(
-                        reference_path,
-                        jinja_env,
-                    )
+            if ref == DYNAMIC_REFERENCE:
+                continue
+
+            reference_path = self.get_path_for_reference(ref)
+            if reference_path and reference_path not in parents:
+                references |= self._get_references(reference_path, parents | {path})
+
+        self._references[path] = references
+
+        return references
+
+    def get_direct_references(self, path: str) -> List[str]:
+        if path not in self._direct_references:
+            with open(path, "r") as f:
+                ast = self.jinja_env.parse(f.read())
+
+            # Dynamic references (variables) come back as None
+            self._direct_references[path] = [
+                x or DYNAMIC_REFERENCE
+                for x in chain(
+                    meta.find_referenced_templates(ast), find_raw_includes(ast)
                 )
+            ]
 
-    return list(references)
+        return self._direct_references[path]
+
+    def get_path_for_reference(self, reference: str) -> Optional[str]:
+        if reference not in self._reference_paths:
+            self._reference_paths[reference] = get_path_for_reference(
+                reference, self.jinja_env
+            )
+
+        return self._reference_paths[reference]
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """
+        Forget what we know about a changed template (or everything).
+        The recursive sets are cheap to rebuild from the parsed templates,
+        so those are always cleared.
+        """
+        if path:
+            self._direct_references.pop(path, None)
+        else:
+            self._direct_references = {}
+
+        self._references = {}
+        self._reference_paths = {}
+
+
+def get_reference_index(jinja_env: Environment) -> ReferenceIndex:
+    if not hasattr(jinja_env, "reference_index"):
+        jinja_env.extend(reference_index=ReferenceIndex(jinja_env))
+
+    return jinja_env.reference_index  # type: ignore
+
+
+def get_references_in_path(path: str, jinja_env: Environment) -> List[str]:
+    """Get all (recursive) references that go into this file"""
+    return get_reference_index(jinja_env).get_references_in_path(path)
 
 
 def get_path_for_reference(reference: str, jinja_env: Environment) -> Optional[str]:
-    return jinja_env.get_template(reference).filename
+    try:
+        return jinja_env.get_template(reference).filename
+    except TemplateNotFound:
+        # Still a reference, so whatever uses it is rebuilt if it's added later
+        return None
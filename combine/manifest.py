@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Set
+
+from .cache import write_atomic
+from .logger import logger
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_data(data: Any) -> str:
+    """Hash arbitrary (mostly JSON-like) data, such as the site variables"""
+
+    def default(obj: Any) -> str:
+        if callable(obj):
+            # Functions like "now" can't be serialized, but their identity is stable
+            return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+        return str(obj)
+
+    try:
+        serialized = json.dumps(data, sort_keys=True, default=default)
+    except TypeError:
+        # Mixed key types can't be sorted
+        serialized = json.dumps(data, default=default)
+
+    return hash_bytes(serialized.encode("utf-8"))
+
+
+# Recorded for outputs that are error pages, which never match a real fingerprint
+# (so they're rendered again, and still removed if their source is deleted)
+ERROR_FINGERPRINT = "error"
+
+
+class BuildManifest:
+    """
+    A record of everything the last build rendered into the output path,
+    so the next build can skip files whose inputs haven't changed
+    and remove outputs whose sources are gone.
+    """
+
+    def __init__(self, path: str, output_path: str) -> None:
+        from . import __version__
+
+        self.path = path
+        self.output_path = output_path
+        self.version = __version__
+        self.entries: Dict[str, dict] = {}
+
+        # Source hashes are reused when a file's stat hasn't changed
+        self._source_stats: Dict[str, dict] = {}
+
+    def load(self) -> None:
+        self.entries = {}
+        self._source_stats = {}
+
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug("Ignoring unreadable build manifest %s: %s", self.path, e)
+            return
+
+        if data.get("version") != self.version:
+            return
+
+        if data.get("output_path") != self.output_path:
+            return
+
+        self.entries = data.get("entries", {})
+        self._source_stats = data.get("sources", {})
+
+    def save(self) -> None:
+        data = {
+            "version": self.version,
+            "output_path": self.output_path,
+            "entries": self.entries,
+            "sources": self._source_stats,
+        }
+        write_atomic(self.path, json.dumps(data).encode("utf-8"))
+
+    def clear(self) -> None:
+        self.entries = {}
+        self._source_stats = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def hash_source(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._source_stats.get(path)
+
+        if (
+            cached
+            and cached["mtime"] == stat.st_mtime_ns
+            and cached["size"] == stat.st_size
+        ):
+            return cached["hash"]
+
+        with open(path, "rb") as f:
+            source_hash = hash_bytes(f.read())
+
+        self._source_stats[path] = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": source_hash,
+        }
+
+        return source_hash
+
+    def retain_sources(self, paths: Set[str]) -> None:
+        """Forget the stats for any sources that are no longer part of the site"""
+        self._source_stats = {k: v for k, v in self._source_stats.items() if k in paths}
+
+    def is_current(self, output_relative_path: str, fingerprint: str) -> bool:
+        entry = self.entries.get(output_relative_path)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+
+        # The output could have been deleted by hand
+        return os.path.exists(os.path.join(self.output_path, output_relative_path))
+
+    def record(
+        self, output_relative_path: str, source_path: str, fingerprint: str
+    ) -> None:
+        self.entries[output_relative_path] = {
+            "source": source_path,
+            "fingerprint": fingerprint,
+        }
+
+    def discard(self, output_relative_path: str) -> Optional[dict]:
+        return self.entries.pop(output_relative_path, None)
+
+    def remove_output(self, output_relative_path: str) -> None:
+        """Delete an output file (and any directories it leaves empty)"""
+        self.discard(output_relative_path)
+
+        target_path = os.path.join(self.output_path, output_relative_path)
+        if os.path.exists(target_path):
+            os.remove(target_path)
+
+        parent = os.path.dirname(target_path)
+        while parent != self.output_path and parent.startswith(self.output_path):
+            if os.listdir(parent):
+                break
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
@@ -0,0 +1,90 @@
+"""
+Process pool helpers for rendering files in parallel.
+
+Each worker process loads its own Combine instance once (config, Jinja environment
+and content directories) and then renders whichever files it is handed.
+Files aren't loaded up front, since rendering a file loads it anyway.
+"""
+import os
+import pickle
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .core import Combine, FileChecks
+    from .files import File
+
+
+_combine: Optional["Combine"] = None
+_files_by_path: Dict[str, "File"] = {}
+
+
+@contextmanager
+def picklable_errors() -> Iterator[None]:
+    """Errors have to be pickled to make it back to the main process"""
+    try:
+        yield
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            raise RuntimeError(f"{e.__class__.__name__}: {e}")
+        raise
+
+
+def init_worker(
+    config_path: str,
+    env: Optional[str],
+    variables: dict,
+    precompiled: bool = False,
+    load_content: bool = True,
+) -> None:
+    global _combine, _files_by_path
+
+    from .core import Combine
+
+    _combine = Combine(
+        config_path=config_path,
+        env=env,
+        variables=variables,
+        precompiled=precompiled,
+        load_content=load_content,
+    )
+    _files_by_path = {x.path: x for x in _combine.iter_files()}
+
+
+def render_file(
+    path: str, html_parser: Optional[str] = None
+) -> Tuple[str, List[str], Optional["FileChecks"]]:
+    """
+    Render a file in the worker and return its output path and references,
+    plus its checks if an html_parser is given
+    """
+    assert _combine, "Worker was not initialized"
+
+    file = _files_by_path[path]
+
+    with picklable_errors():
+        _combine.render_file(file)
+
+        checks = _combine.check_file(file, html_parser) if html_parser else None
+
+    return file.output_path, file.references, checks
+
+
+def check_file(path: str, html_parser: str) -> "FileChecks":
+    """Check the existing output of a file that didn't need to be rendered"""
+    assert _combine, "Worker was not initialized"
+
+    file = _files_by_path[path]
+    file.output_path = os.path.join(_combine.output_path, file.output_relative_path)
+
+    with picklable_errors():
+        return _combine.check_file(file, html_parser)
+
+
+def compile_template(name: str, target_path: str) -> str:
+    assert _combine, "Worker was not initialized"
+
+    with picklable_errors():
+        return _combine.compile_template(name, target_path)
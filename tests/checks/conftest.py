@@ -0,0 +1,23 @@
+import pytest
+from snapshottest.pytest import PyTestSnapshotTest
+
+from combine.checks.parsers import get_installed_html_parsers
+
+
+class SharedSnapshotTest(PyTestSnapshotTest):
+    """Compare every parser against the same snapshot, instead of one per parameter"""
+
+    @property
+    def test_name(self):
+        return f"{self.request.node.originalname} {self.curr_snapshot}"
+
+
+@pytest.fixture
+def snapshot(request):
+    with SharedSnapshotTest(request) as snapshot_test:
+        yield snapshot_test
+
+
+@pytest.fixture(params=get_installed_html_parsers())
+def html_parser(request):
+    return request.param
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# snapshottest: v1 - https://goo.gl/zC4yUc
+from __future__ import unicode_literals
+
+from snapshottest import Snapshot
+
+
+snapshots = Snapshot()
+
+snapshots['test_font_display_check 1'] = [
+    {
+        'context': {
+            'element': '<link href="https://fonts.googleapis.com/css2?family=Inter" rel="stylesheet"/>'
+        },
+        'type': 'font-display-missing'
+    },
+    {
+        'context': {
+            'element': '@font-face { font-family: "Inline"; src: url("/inline.woff2"); }'
+        },
+        'type': 'font-display-missing'
+    },
+    {
+        'context': {
+            'element': '@font-face { font-family: "Inter"; src: url("/inter.woff2") format("woff2"); }',
+            'stylesheet': 'fonts.css'
+        },
+        'type': 'font-display-missing'
+    }
+]
+
+snapshots['test_img_dimensions_check 1'] = [
+    {
+        'context': {
+            'element': '<img alt="" src="a.png"/>'
+        },
+        'type': 'image-dimensions-missing'
+    },
+    {
+        'context': {
+            'element': '<img alt="" src="b.png" width="100"/>'
+        },
+        'type': 'image-dimensions-missing'
+    }
+]
+
+snapshots['test_img_lazy_loading_check 1'] = [
+    {
+        'context': {
+            'element': '<img alt="" src="5.png"/>'
+        },
+        'type': 'image-lazy-loading-missing'
+    }
+]
+
+snapshots['test_render_blocking_script_check 1'] = [
+    {
+        'context': {
+            'element': '<script src="/blocking.js"></script>'
+        },
+        'type': 'render-blocking-script'
+    }
+]
+
+snapshots['test_stylesheet_count_check 1'] = [
+    {
+        'context': {
+            'count': 5,
+            'stylesheets': [
+                '/1.css',
+                '/2.css',
+                '/3.css',
+                '/4.css',
+                '/5.css'
+            ]
+        },
+        'type': 'stylesheets-too-many'
+    }
+]
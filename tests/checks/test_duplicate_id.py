@@ -3,7 +3,7 @@ from bs4 import BeautifulSoup
 from combine.checks.duplicate_id import DuplicateIDCheck
 
 
-def test_duplicate_id_check(snapshot):
+def test_duplicate_id_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -14,6 +14,6 @@ def test_duplicate_id_check(snapshot):
         <div id="bar"></div>
     </body>
 </html>"""
-    check = DuplicateIDCheck(BeautifulSoup(content, "html.parser"))
+    check = DuplicateIDCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
@@ -3,7 +3,7 @@ from bs4 import BeautifulSoup
 from combine.checks.img_alt import ImgAltCheck
 
 
-def test_img_alt_check(snapshot):
+def test_img_alt_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -14,6 +14,6 @@ def test_img_alt_check(snapshot):
         <img alt="test">
     </body>
 </html>"""
-    check = ImgAltCheck(BeautifulSoup(content, "html.parser"))
+    check = ImgAltCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
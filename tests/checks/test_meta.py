@@ -3,7 +3,7 @@ from bs4 import BeautifulSoup
 from combine.checks.meta import MetaDescriptionCheck
 
 
-def test_meta_description_empty_check(snapshot):
+def test_meta_description_empty_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -12,12 +12,12 @@ def test_meta_description_empty_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = MetaDescriptionCheck(BeautifulSoup(content, "html.parser"))
+    check = MetaDescriptionCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
 
 
-def test_meta_description_length_check(snapshot):
+def test_meta_description_length_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -26,6 +26,6 @@ def test_meta_description_length_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = MetaDescriptionCheck(BeautifulSoup(content, "html.parser"))
+    check = MetaDescriptionCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
@@ -3,7 +3,7 @@ from bs4 import BeautifulSoup
 from combine.checks.mixed_content import MixedContentCheck
 
 
-def test_duplicate_id_check(snapshot):
+def test_duplicate_id_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -18,9 +18,11 @@ def test_duplicate_id_check(snapshot):
         <img src="http://example.com/image.png">
 
         <iframe src="https://external.com">
+</iframe>
         <iframe src="http://external.com">
+</iframe>
     </body>
 </html>"""
-    check = MixedContentCheck(BeautifulSoup(content, "html.parser"))
+    check = MixedContentCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
@@ -10,7 +10,7 @@ from combine.checks.open_graph import (
 )
 
 
-def test_open_graph_missing_checks(snapshot):
+def test_open_graph_missing_checks(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -18,7 +18,7 @@ def test_open_graph_missing_checks(snapshot):
     <body>
     </body>
 </html>"""
-    soup = BeautifulSoup(content, "html.parser")
+    soup = BeautifulSoup(content, html_parser)
 
     check_classes = (
         OpenGraphTitleCheck,
@@ -35,7 +35,7 @@ def test_open_graph_missing_checks(snapshot):
         snapshot.assert_match(issues.as_data())
 
 
-def test_open_graph_url_check(snapshot):
+def test_open_graph_url_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -44,12 +44,12 @@ def test_open_graph_url_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = OpenGraphURLCheck(BeautifulSoup(content, "html.parser"))
+    check = OpenGraphURLCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
 
 
-def test_open_graph_url_check_invalid(snapshot):
+def test_open_graph_url_check_invalid(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -58,13 +58,13 @@ def test_open_graph_url_check_invalid(snapshot):
     <body>
     </body>
 </html>"""
-    check = OpenGraphURLCheck(BeautifulSoup(content, "html.parser"))
+    check = OpenGraphURLCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     assert len(issues) > 0
     snapshot.assert_match(issues.as_data())
 
 
-def test_open_graph_image_check(snapshot):
+def test_open_graph_image_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -73,6 +73,6 @@ def test_open_graph_image_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = OpenGraphImageCheck(BeautifulSoup(content, "html.parser"))
+    check = OpenGraphImageCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
@@ -0,0 +1,118 @@
+from bs4 import BeautifulSoup
+
+from combine.checks.performance import (
+    FontDisplayCheck,
+    ImgDimensionsCheck,
+    ImgLazyLoadingCheck,
+    RenderBlockingScriptCheck,
+    StylesheetCountCheck,
+)
+
+
+def test_render_blocking_script_check(snapshot, html_parser):
+    content = """<!doctype html>
+<html>
+    <head>
+        <script src="/blocking.js"></script>
+        <script src="/deferred.js" defer></script>
+        <script src="/async.js" async></script>
+        <script src="/module.js" type="module"></script>
+        <script>console.log("inline")</script>
+    </head>
+    <body>
+        <script src="/body.js"></script>
+    </body>
+</html>"""
+    check = RenderBlockingScriptCheck(BeautifulSoup(content, html_parser))
+    issues = check.run()
+    snapshot.assert_match(issues.as_data())
+
+
+def test_img_dimensions_check(snapshot, html_parser):
+    content = """<!doctype html>
+<html>
+    <head>
+    </head>
+    <body>
+        <img src="a.png" alt="">
+        <img src="b.png" alt="" width="100">
+        <img src="c.png" alt="" width="100" height="100">
+    </body>
+</html>"""
+    check = ImgDimensionsCheck(BeautifulSoup(content, html_parser))
+    issues = check.run()
+    snapshot.assert_match(issues.as_data())
+
+
+def test_img_lazy_loading_check(snapshot, html_parser):
+    content = """<!doctype html>
+<html>
+    <head>
+    </head>
+    <body>
+        <img src="1.png" alt="">
+        <img src="2.png" alt="">
+        <img src="3.png" alt="">
+        <img src="4.png" alt="" loading="lazy">
+        <img src="5.png" alt="">
+    </body>
+</html>"""
+    check = ImgLazyLoadingCheck(BeautifulSoup(content, html_parser))
+    issues = check.run()
+    snapshot.assert_match(issues.as_data())
+
+
+def test_stylesheet_count_check(snapshot, html_parser):
+    content = """<!doctype html>
+<html>
+    <head>
+        <link rel="stylesheet" href="/1.css">
+        <link rel="stylesheet" href="/2.css">
+        <link rel="stylesheet" href="/3.css">
+        <link rel="stylesheet" href="/4.css">
+        <link rel="alternate stylesheet" href="/dark.css">
+        <link rel="icon" href="/favicon.ico">
+        <link rel="stylesheet" href="/5.css">
+    </head>
+    <body>
+    </body>
+</html>"""
+    check = StylesheetCountCheck(BeautifulSoup(content, html_parser))
+    issues = check.run()
+    snapshot.assert_match(issues.as_data())
+
+
+def test_font_display_check(snapshot, html_parser, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "fonts.css").write_text(
+        """@font-face {
+    font-family: "Inter";
+    src: url("/inter.woff2") format("woff2");
+}
+@font-face {
+    font-family: "Mono";
+    src: url("/mono.woff2") format("woff2");
+    font-display: swap;
+}"""
+    )
+    content = """<!doctype html>
+<html>
+    <head>
+        <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter">
+        <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter&display=swap">
+        <link rel="stylesheet" href="fonts.css">
+        <link rel="stylesheet" href="/missing.css">
+        <style>
+            @font-face { font-family: "Inline"; src: url("/inline.woff2"); }
+        </style>
+    </head>
+    <body>
+    </body>
+</html>"""
+    check = FontDisplayCheck(
+        BeautifulSoup(content, html_parser),
+        file_path=str(tmp_path / "index.html"),
+        output_dir=str(tmp_path) + "/",
+    )
+    issues = check.run()
+    snapshot.assert_match(issues.as_data())
@@ -3,7 +3,7 @@ from bs4 import BeautifulSoup
 from combine.checks.title import TitleCheck
 
 
-def test_title_empty_check(snapshot):
+def test_title_empty_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -12,12 +12,12 @@ def test_title_empty_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = TitleCheck(BeautifulSoup(content, "html.parser"))
+    check = TitleCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
 
 
-def test_title_missing_check(snapshot):
+def test_title_missing_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -25,12 +25,12 @@ def test_title_missing_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = TitleCheck(BeautifulSoup(content, "html.parser"))
+    check = TitleCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
 
 
-def test_title_ok_check(snapshot):
+def test_title_ok_check(snapshot, html_parser):
     content = """<!doctype html>
 <html>
     <head>
@@ -39,6 +39,6 @@ def test_title_ok_check(snapshot):
     <body>
     </body>
 </html>"""
-    check = TitleCheck(BeautifulSoup(content, "html.parser"))
+    check = TitleCheck(BeautifulSoup(content, html_parser))
     issues = check.run()
     snapshot.assert_match(issues.as_data())
@@ -0,0 +1,17 @@
+import os
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def site_dir(tmp_path, monkeypatch):
+    """A copy of tests/site (without its output) to build in, as the working directory"""
+    site_dir = tmp_path / "site"
+    shutil.copytree(
+        os.path.join(os.path.dirname(__file__), "site"),
+        site_dir,
+        ignore=shutil.ignore_patterns("output", ".cache"),
+    )
+    monkeypatch.chdir(site_dir)
+    return site_dir
@@ -1,15 +1,15 @@
 import subprocess
 import os
 
-from combine import Combine
-
+import pytest
 
-def test_combine_build():
-    site_dir = os.path.join(os.path.dirname(__file__), "site")
+from combine import Combine
+from combine.exceptions import BuildError
+from combine.files import HTMLFile
 
-    # Pretend we are in tests/site
-    os.chdir(site_dir)
 
+def test_combine_build(site_dir):
+    # A copy of tests/site, so there's no manifest (or output) from an earlier run
     combine = Combine(config_path="combine.yml")
     combine.build()
 
@@ -19,3 +19,277 @@ def test_combine_build():
     res = subprocess.run(["diff", "-w", "-r", site_output_dir, site_output_expected_dir], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
     assert res.stdout.decode("utf-8") == ""
     assert res.returncode == 0
+
+
+def test_combine_incremental_build(site_dir):
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    index_output = site_dir / "output" / "index.html"
+    pricing_output = site_dir / "output" / "pricing" / "index.html"
+    index_mtime = index_output.stat().st_mtime_ns
+
+    # Only the changed file is rendered again
+    (site_dir / "content" / "pricing.html").write_text(
+        '{% extends "base.template.html" %}\n\n{% block content %}Plans{% endblock %}'
+    )
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    assert index_output.stat().st_mtime_ns == index_mtime
+    assert "Plans" in pricing_output.read_text()
+
+    # Changing a template re-renders everything that uses it
+    base_template = site_dir / "content" / "base.template.html"
+    base_template.write_text(base_template.read_text().replace("Document", "Site"))
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    assert "<title>Site</title>" in index_output.read_text()
+    assert "<title>Site</title>" in pricing_output.read_text()
+
+    # Outputs of deleted files are removed
+    (site_dir / "content" / "pricing.html").unlink()
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    assert not pricing_output.exists()
+    assert not pricing_output.parent.exists()
+    assert index_output.exists()
+
+
+def test_combine_incremental_build_removes_error_pages(site_dir):
+    broken = site_dir / "content" / "broken.html"
+    broken.write_text("{{ missing_variable }}")
+
+    combine = Combine(config_path="combine.yml")
+    with pytest.raises(BuildError):
+        combine.build(check=False)
+
+    broken_output = site_dir / "output" / "broken" / "index.html"
+    assert "broken.html" in broken_output.read_text()
+
+    # Still rendered again (and still an error)
+    combine = Combine(config_path="combine.yml")
+    with pytest.raises(BuildError):
+        combine.build(check=False)
+
+    # The error page goes away with its source
+    broken.unlink()
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+    assert not broken_output.exists()
+
+
+def test_combine_incremental_build_untracked_references(site_dir):
+    snippet = site_dir / "content" / "_snippet.txt"
+    snippet.write_text("v1")
+    (site_dir / "content" / "raw.html").write_text('{% include_raw "_snippet.txt" %}')
+    (site_dir / "content" / "_partial.html").write_text("Partial v1")
+    (site_dir / "content" / "dynamic.html").write_text(
+        '{% set name = "_partial.html" %}{% include name %}'
+    )
+
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    raw_output = site_dir / "output" / "raw" / "index.html"
+    dynamic_output = site_dir / "output" / "dynamic" / "index.html"
+    assert raw_output.read_text() == "v1"
+    assert dynamic_output.read_text() == "Partial v1"
+
+    # Files read by include_raw are part of the fingerprint
+    snippet.write_text("v2")
+    (site_dir / "content" / "_partial.html").write_text("Partial v2")
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    assert raw_output.read_text() == "v2"
+    # References that aren't known until rendering are always rendered
+    assert dynamic_output.read_text() == "Partial v2"
+
+
+def test_combine_parallel_build(site_dir, monkeypatch):
+    combine = Combine(config_path="combine.yml")
+    combine.build(jobs=2)
+
+    res = subprocess.run(
+        ["diff", "-w", "-r", site_dir / "output", site_dir / "output_expected"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert res.stdout.decode("utf-8") == ""
+
+    # Files are checked in the workers, but the issues are in the same order
+    assert combine.issues
+    serial = Combine(config_path="combine.yml")
+    serial.build(clean=True, jobs=1)
+    assert combine.issues.as_data() == serial.issues.as_data()
+
+    # Errors in a worker still fail the build and render an error page
+    (site_dir / "content" / "broken.html").write_text("{{ missing_variable }}")
+    combine = Combine(config_path="combine.yml")
+    with pytest.raises(BuildError):
+        combine.build(jobs=2, check=False)
+
+    assert "broken.html" in (site_dir / "output" / "broken" / "index.html").read_text()
+
+    # Builds of specific files don't start a pool
+    def render_files_in_pool(*args, **kwargs):
+        raise AssertionError("Started a pool")
+
+    monkeypatch.setattr(combine, "render_files_in_pool", render_files_in_pool)
+    (site_dir / "content" / "broken.html").unlink()
+    index = str(site_dir / "content" / "index.html")
+    pricing = str(site_dir / "content" / "pricing.html")
+    combine.build([index, pricing], jobs=2)
+
+
+def test_combine_precompiled_build(site_dir):
+    combine = Combine(config_path="combine.yml")
+    assert combine.compile_templates(jobs=2) == {}
+
+    combine = Combine(config_path="combine.yml", precompiled=True)
+    template = combine.jinja_environment.get_template("index.html")
+    assert template.root_render_func.__module__.startswith("_jinja2_module_templates")
+    assert template.filename == str(site_dir / "content" / "index.html")
+
+    combine.build(check=False)
+
+    res = subprocess.run(
+        ["diff", "-w", "-r", site_dir / "output", site_dir / "output_expected"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    assert res.stdout.decode("utf-8") == ""
+
+    # Templates that changed after compiling are loaded from source instead
+    base_template = site_dir / "content" / "base.template.html"
+    base_template.write_text(base_template.read_text().replace("Document", "Site"))
+    combine = Combine(config_path="combine.yml", precompiled=True)
+    combine.build(check=False)
+    assert "<title>Site</title>" in (site_dir / "output" / "index.html").read_text()
+
+    # Syntax errors are all reported up front
+    (site_dir / "content" / "broken.html").write_text("{% if %}")
+    (site_dir / "content" / "_broken_partial.html").write_text("{% for %}")
+    combine = Combine(config_path="combine.yml")
+    errors = combine.compile_templates()
+    assert sorted(os.path.basename(x) for x in errors) == [
+        "_broken_partial.html",
+        "broken.html",
+    ]
+
+
+def test_combine_checks_rendered_html(site_dir, monkeypatch):
+    combine = Combine(config_path="combine.yml")
+    original_check_file = combine.check_file
+    index_files = []
+
+    def check_file(file, html_parser):
+        if file.content_relative_path == "index.html":
+            # Rewriting the output (like the dev server does) doesn't affect the checks
+            (site_dir / "output" / "index.html").write_text("<html></html>")
+            index_files.append(file)
+        return original_check_file(file, html_parser)
+
+    monkeypatch.setattr(combine, "check_file", check_file)
+    combine.build()
+
+    assert "title-missing" not in [x.type for x in combine.issues]
+
+    # Released after checking, so the output is read from disk again
+    index = index_files[0]
+    assert index.rendered_html is None
+    assert "title-missing" in [x.type for x in index.check_output()]
+
+
+def test_combine_check_cache(site_dir, monkeypatch):
+    (site_dir / "content" / "about.html").write_text(
+        '{% extends "base.template.html" %}'
+        '{% block content %}<a href="/pricing/">Pricing</a>{% endblock %}'
+    )
+
+    combine = Combine(config_path="combine.yml")
+    combine.build()
+    issues = combine.issues.as_data()
+    assert issues
+
+    checked = []
+    original_check_output = HTMLFile.check_output
+
+    def check_output(self, *args, **kwargs):
+        checked.append(self.content_relative_path)
+        return original_check_output(self, *args, **kwargs)
+
+    monkeypatch.setattr(HTMLFile, "check_output", check_output)
+
+    # Same HTML, so nothing needs to be parsed again
+    combine = Combine(config_path="combine.yml")
+    combine.build(clean=True)
+    assert checked == []
+    assert combine.issues.as_data() == issues
+
+    # Links are still checked against the current output
+    (site_dir / "content" / "pricing.html").unlink()
+    combine = Combine(config_path="combine.yml")
+    combine.build()
+    assert checked == []
+    assert [x for x in combine.issues.as_data() if x not in issues] == [
+        {
+            "type": "internal-link-broken",
+            "context": {
+                "element": '<a href="/pricing/">Pricing</a>',
+                "target_path": os.path.join("output", "pricing", "index.html"),
+            },
+        }
+    ]
+
+    # Results that no longer fit are pruned at the end of the build
+    checks_path = site_dir / ".cache" / "combine" / "checks"
+    assert list(checks_path.rglob("*/*"))
+    combine = Combine(config_path="combine.yml")
+    combine.check_cache.max_size = 0
+    combine.build()
+    assert not list(checks_path.rglob("*/*"))
+
+
+def test_combine_fragment_links(site_dir):
+    (site_dir / "content" / "pricing.html").write_text(
+        '{% extends "base.template.html" %}'
+        '{% block content %}<h2 id="plans">Plans</h2><a name="faq"></a>{% endblock %}'
+    )
+    (site_dir / "content" / "about.html").write_text(
+        '{% extends "base.template.html" %}'
+        "{% block content %}"
+        '<h2 id="team">Team</h2>'
+        '<a href="#team">Team</a><a href="#top">Top</a><a href="#missing">Missing</a>'
+        '<a href="/pricing/#plans">Plans</a><a href="../pricing/#faq">FAQ</a>'
+        '<a href="/pricing/#free%20tier">Free</a><a href="/gone/#plans">Gone</a>'
+        "{% endblock %}"
+    )
+
+    for jobs in (1, 2):
+        combine = Combine(config_path="combine.yml")
+        combine.build(clean=True, jobs=jobs)
+
+        assert [
+            x["context"]
+            for x in combine.issues.as_data()
+            if x["type"].startswith("internal-link")
+        ] == [
+            {
+                "element": '<a href="#missing">Missing</a>',
+                "fragment": "missing",
+                "target_path": os.path.join("output", "about", "index.html"),
+            },
+            {
+                "element": '<a href="/pricing/#free%20tier">Free</a>',
+                "fragment": "free tier",
+                "target_path": os.path.join("output", "pricing", "index.html"),
+            },
+            {
+                "element": '<a href="/gone/#plans">Gone</a>',
+                "target_path": os.path.join("output", "gone", "index.html"),
+            },
+        ]
@@ -0,0 +1,219 @@
+import os
+
+import pytest
+import yaml
+from bs4 import BeautifulSoup
+
+from combine import Combine
+from combine.checks.base import HTMLCheck, run_checks, walk_html
+from combine.checks.duplicate_id import DuplicateIDCheck
+from combine.checks.img_alt import ImgAltCheck
+from combine.checks.links import InternalLinkBrokenCheck
+from combine.checks.mixed_content import MixedContentCheck
+from combine.checks.output_index import OutputIndex
+from combine.checks.page_weight import PageWeightBudgets, PageWeightCheck, parse_size
+from combine.checks.title import TitleCheck
+
+
+HTML = """<html><head><title>Test</title><link rel="stylesheet" href="http://a.css"></head>
+<body><img src="http://a.png" id="a"><p id="a"></p><img src="b.png" alt=""><img src="c.png"></body></html>"""
+
+
+def test_run_checks_single_pass(monkeypatch):
+    html_soup = BeautifulSoup(HTML, "html.parser")
+    checks = [
+        DuplicateIDCheck(html_soup=html_soup),
+        MixedContentCheck(html_soup=html_soup),
+        ImgAltCheck(html_soup=html_soup),
+        TitleCheck(html_soup=html_soup),
+    ]
+
+    # Same issues, in the same order, as running each check by itself
+    expected = [issue.as_data() for check in checks for issue in check.run()]
+    assert [x["type"] for x in expected] == [
+        "duplicate-id",
+        "https-mixed-content",
+        "https-mixed-content",
+        "image-alt-missing",
+        "image-alt-missing",
+    ]
+
+    visited = []
+    original_visit = ImgAltCheck.visit
+
+    def visit(self, element):
+        visited.append(element.name)
+        original_visit(self, element)
+
+    monkeypatch.setattr(ImgAltCheck, "visit", visit)
+
+    assert run_checks(checks).as_data() == expected
+    assert visited == ["img", "img", "img"]
+
+
+def test_html_check_run_resets():
+    class CountCheck(HTMLCheck):
+        tags = {"p"}
+
+        def start(self):
+            self.count = 0
+
+        def visit(self, element):
+            self.count += 1
+
+        def finish(self):
+            return self.count
+
+    check = CountCheck(html_soup=BeautifulSoup(HTML, "html.parser"))
+    assert check.run() == 1
+    assert check.run() == 1
+
+
+def test_internal_links_output_index(tmp_path, monkeypatch):
+    (tmp_path / "about").mkdir()
+    (tmp_path / "about" / "index.html").write_text("")
+    (tmp_path / "style.css").write_text("")
+    (tmp_path / "index.html").write_text("")
+
+    html_soup = BeautifulSoup(
+        """<a href="/about/">About</a><a href="/about">About</a><a href="about/">About</a>
+        <a href="/missing/">Missing</a><link href="/style.css?v=1"><img src="missing.png">""",
+        "html.parser",
+    )
+    check = InternalLinkBrokenCheck(
+        html_soup=html_soup,
+        file_path=str(tmp_path / "index.html"),
+        output_dir=str(tmp_path) + "/",
+    )
+    expected = check.run().as_data()
+    assert [x["context"]["element"] for x in expected] == [
+        '<img src="missing.png"/>',
+        '<a href="/missing/">Missing</a>',
+    ]
+
+    output_index = OutputIndex(str(tmp_path))
+
+    stats = []
+    original_exists = os.path.exists
+
+    def exists(path):
+        stats.append(path)
+        return original_exists(path)
+
+    monkeypatch.setattr(os.path, "exists", exists)
+
+    assert check.finish_deferred(output_index).as_data() == expected
+    # Only the missing files need to be checked on disk
+    assert len(stats) == 2
+
+
+def test_page_weight(tmp_path, monkeypatch):
+    (tmp_path / "blog").mkdir()
+    (tmp_path / "fonts").mkdir()
+    css = (
+        '@font-face { src: url("/fonts/a.woff2") format("woff2"); }'
+        "body { background: url(bg.png); }"
+    )
+    (tmp_path / "style.css").write_text(css)
+    (tmp_path / "fonts" / "a.woff2").write_bytes(b"x" * 3000)
+    (tmp_path / "app.js").write_bytes(b"x" * 1000)
+    (tmp_path / "logo.png").write_bytes(b"x" * 5000)
+
+    html = """<html><head><link rel="stylesheet" href="/style.css?v=1">
+    <link rel="canonical" href="/"><script src="/app.js"></script>
+    <style>body { color: red; }</style></head>
+    <body><img src="/logo.png"><img src="/logo.png?v=2"><img src="data:image/png;base64,AAAA">
+    <svg><svg></svg></svg><a href="/missing.png">Not loaded</a></body></html>"""
+
+    pages = []
+    for path in ("index.html", "blog/index.html"):
+        (tmp_path / path).write_text(html)
+        pages.append(
+            PageWeightCheck(
+                html_soup=BeautifulSoup(html, "html.parser"),
+                file_path=str(tmp_path / path),
+                output_dir=str(tmp_path) + "/",
+            )
+        )
+
+    budgets = PageWeightBudgets(
+        {
+            "*": {"total": "9KB", "inline_style": 10},
+            "blog/*": {"total": "10KB", "data_uri": "10 bytes", "inline_style": None},
+        }
+    )
+    assert budgets.get_budgets("blog/index.html") == {
+        "total": 10_000,
+        "inline_svg": 50_000,
+        "inline_style": None,
+        "data_uri": 10,
+    }
+
+    output_index = OutputIndex(str(tmp_path), page_weight_budgets=budgets)
+
+    sizes = []
+    original_getsize = os.path.getsize
+
+    def getsize(path):
+        sizes.append(path)
+        return original_getsize(path)
+
+    monkeypatch.setattr(os.path, "getsize", getsize)
+
+    # The page, stylesheet, font, script and image (once)
+    page_weight = len(html) + len(css) + 3000 + 1000 + 5000
+
+    assert [x.as_data() for x in run_deferred(pages[0], output_index)] == [
+        {
+            "type": "inline-content-too-large",
+            "context": {
+                "element": "<style>body { color: red; }</style>",
+                "size": "20.0 bytes",
+                "budget": "10.0 bytes",
+            },
+        },
+        {
+            "type": "page-weight-too-large",
+            "context": {
+                "output_path": os.path.relpath(tmp_path / "index.html"),
+                "page_weight": f"{page_weight / 1000:.1f}KB",
+                "budget": "9.0KB",
+            },
+        },
+    ]
+    assert [x.as_data()["type"] for x in run_deferred(pages[1], output_index)] == [
+        "inline-content-too-large"
+    ]
+
+    # Each file only needs its size looked up once
+    assert len(sizes) == len(set(sizes)) == 6
+
+
+def run_deferred(check, output_index):
+    walk_html(check.html_soup, [check])
+    return check.finish_deferred(output_index)
+
+
+@pytest.mark.parametrize(
+    "page_weight",
+    [
+        "1MB",
+        {"*": "1MB"},
+        {"*": {"totl": "1MB"}},
+        {"*": {"total": "1 lightyear"}},
+    ],
+)
+def test_page_weight_config(site_dir, page_weight):
+    with open("combine.yml", "a") as f:
+        yaml.safe_dump({"page_weight": page_weight}, f)
+
+    # Invalid budgets fail when the config is loaded, not when a page is checked
+    with pytest.raises(ValueError):
+        Combine(config_path="combine.yml")
+
+
+def test_parse_size():
+    assert parse_size(1000) == 1000
+    assert parse_size("1.5 MB") == 1_500_000
+    assert parse_size("20kb") == 20_000
+    assert parse_size(None) is None
@@ -0,0 +1,47 @@
+import os
+
+from combine import Combine
+
+
+def test_related_files(monkeypatch):
+    monkeypatch.chdir(os.path.join(os.path.dirname(__file__), "site"))
+
+    combine = Combine(config_path="combine.yml")
+
+    related = [
+        x.content_relative_path for x in combine.get_related_files("base.template.html")
+    ]
+    assert sorted(related) == [
+        "base.template.html",
+        "index.html",
+        "markdown.md",
+        "markdown.template.html",
+        "pricing.html",
+    ]
+
+    related = [x.content_relative_path for x in combine.get_related_files("index.html")]
+    assert related == ["index.html"]
+
+    assert combine.get_related_files("missing.html") == []
+
+
+def test_references_parsed_once(monkeypatch):
+    monkeypatch.chdir(os.path.join(os.path.dirname(__file__), "site"))
+
+    combine = Combine(config_path="combine.yml")
+    reference_index = combine.jinja_environment.reference_index
+
+    parsed = []
+    original_parse = combine.jinja_environment.parse
+
+    def parse(source, *args, **kwargs):
+        parsed.append(source)
+        return original_parse(source, *args, **kwargs)
+
+    monkeypatch.setattr(combine.jinja_environment, "parse", parse)
+
+    reference_index.invalidate()
+    for file in combine.iter_files():
+        file.load(combine.jinja_environment)
+
+    assert len(parsed) == len(set(parsed))
@@ -0,0 +1,177 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from combine.checks.external_links import ExternalLinkChecker
+from combine.core import Combine
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.server.requests.append(("HEAD", self.path))
+        self.server.ports.add(self.client_address[1])
+
+        if self.path == "/get-only":
+            self.respond(405)
+        elif self.path == "/redirect":
+            self.respond(301, {"Location": "/ok"})
+        elif self.path == "/rate-limited":
+            self.respond(429)
+        elif self.path in (
+            "/ok",
+            "/page",
+            "/wiki/%E6%9D%B1%E4%BA%AC?q=caf%C3%A9%20bar",
+        ):
+            self.respond(200)
+        else:
+            self.respond(404)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        self.respond(200, body=b"ok")
+
+    def respond(self, status, headers={}, body=b""):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.requests = []
+    server.ports = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_external_link_checker(server, tmp_path):
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [f"{base}/ok", f"{base}/missing", f"{base}/redirect", f"{base}/get-only"]
+    cache_path = str(tmp_path / "external_links.json")
+
+    checker = ExternalLinkChecker(cache_path=cache_path, per_host=1)
+    assert checker.check(urls + [f"{base}/ok"]) == {
+        f"{base}/ok": None,
+        f"{base}/missing": "HTTP 404",
+        f"{base}/redirect": None,
+        f"{base}/get-only": None,
+    }
+
+    # Each URL once (plus the redirect and fallback), over kept-alive connections
+    # (a new one is only needed after the GET fallback closes one)
+    assert sorted(server.requests) == [
+        ("GET", "/get-only"),
+        ("HEAD", "/get-only"),
+        ("HEAD", "/missing"),
+        ("HEAD", "/ok"),
+        ("HEAD", "/ok"),
+        ("HEAD", "/redirect"),
+    ]
+    assert len(server.ports) == 2
+
+    # Only the broken link is checked again while the cache is fresh
+    server.requests.clear()
+    assert checker.check(urls)[f"{base}/missing"] == "HTTP 404"
+    assert server.requests == [("HEAD", "/missing")]
+
+    server.requests.clear()
+    ExternalLinkChecker(cache_path=cache_path, ttl=0).check(urls)
+    assert len(server.requests) == 6
+
+
+def test_external_link_checker_connection_error():
+    checker = ExternalLinkChecker(timeout=1)
+    # Nothing is listening on port 9 (discard)
+    error = checker.check(["http://127.0.0.1:9/"])["http://127.0.0.1:9/"]
+    assert error
+
+
+def test_external_link_checker_encodes_urls(server):
+    base = f"http://127.0.0.1:{server.server_port}"
+    url = f"{base}/wiki/東京?q=café bar"
+
+    assert ExternalLinkChecker().check([url]) == {url: None}
+    assert server.requests == [("HEAD", "/wiki/%E6%9D%B1%E4%BA%AC?q=caf%C3%A9%20bar")]
+
+
+def test_external_link_checker_rate_limited(server, tmp_path):
+    url = f"http://127.0.0.1:{server.server_port}/rate-limited"
+    checker = ExternalLinkChecker(cache_path=str(tmp_path / "external_links.json"))
+
+    # Not broken, but not cached as working either
+    assert checker.check([url]) == {url: None}
+    assert checker.check([url]) == {url: None}
+    assert server.requests == [("HEAD", "/rate-limited")] * 2
+
+
+def test_external_link_checker_closed_without_response():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def accept_and_close():
+        connection, _ = listener.accept()
+        connection.recv(1024)
+        connection.close()
+
+    thread = threading.Thread(target=accept_and_close, daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{listener.getsockname()[1]}/"
+    try:
+        assert ExternalLinkChecker(timeout=5).check([url]) == {
+            url: "Connection closed without a response"
+        }
+    finally:
+        listener.close()
+
+
+def test_combine_external_links(server, site_dir):
+    base = f"http://127.0.0.1:{server.server_port}"
+    for name in ("about", "contact"):
+        (site_dir / "content" / f"{name}.html").write_text(
+            '{% extends "base.template.html" %}'
+            "{% block content %}"
+            f'<a href="{base}/page#intro">Page</a><a href="{base}/gone">Gone</a>'
+            "{% endblock %}"
+        )
+
+    combine = Combine(config_path="combine.yml")
+    combine.build(clean=True)
+    assert not [x for x in combine.issues.as_data() if x["type"].startswith("external")]
+    assert server.requests == []
+
+    for jobs in (1, 2):
+        server.requests.clear()
+        combine = Combine(config_path="combine.yml", external_links=True)
+        combine.build(clean=True, jobs=jobs)
+
+        assert [
+            x["context"]
+            for x in combine.issues.as_data()
+            if x["type"] == "external-link-broken"
+        ] == [
+            {
+                "element": f'<a href="{base}/gone">Gone</a>',
+                "url": f"{base}/gone",
+                "error": "HTTP 404",
+            }
+        ] * 2
+        # The working link is cached from the first build
+        assert sorted(server.requests) == (
+            [("HEAD", "/gone"), ("HEAD", "/page")] if jobs == 1 else [("HEAD", "/gone")]
+        )
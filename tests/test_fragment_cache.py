@@ -0,0 +1,95 @@
+import jinja2
+
+from combine.cache import RenderCache
+from combine.jinja import FragmentCacheExtension
+
+
+def get_environment(templates, path, variables_hash="a"):
+    templates_path = path / "templates"
+    templates_path.mkdir(exist_ok=True)
+    for name, source in templates.items():
+        (templates_path / name).write_text(source)
+
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(templates_path)),
+        extensions=[FragmentCacheExtension],
+    )
+    env.extend(
+        render_cache=RenderCache(str(path / "cache")), variables_hash=variables_hash
+    )
+    return env
+
+
+def test_fragment_cache_within_build(tmp_path):
+    rendered = []
+    env = get_environment(
+        {
+            "page.html": '{% cache "nav" %}{{ render("nav") }}{% endcache %}'
+            '{% cache "title", title %}<h1>{{ render(title) }}</h1>{% endcache %}'
+        },
+        tmp_path,
+    )
+    env.globals["render"] = lambda x: rendered.append(x) or x
+
+    template = env.get_template("page.html")
+    assert template.render(title="One") == "nav<h1>One</h1>"
+    assert template.render(title="Two") == "nav<h1>Two</h1>"
+    assert template.render(title="One") == "nav<h1>One</h1>"
+    assert rendered == ["nav", "One", "Two"]
+
+    env.fragment_cache.clear()
+    template.render(title="One")
+    assert rendered == ["nav", "One", "Two", "nav", "One"]
+
+
+def test_fragment_cache_persist(tmp_path):
+    rendered = []
+    templates = {
+        "page.html": '{% cache "nav", persist=true %}{% include "nav.html" %}{% endcache %}',
+        "nav.html": '{{ render("nav") }}',
+    }
+
+    def render(templates, variables_hash="a"):
+        env = get_environment(templates, tmp_path, variables_hash)
+        env.globals["render"] = lambda x: rendered.append(x) or x
+        return env.get_template("page.html").render()
+
+    assert render(templates) == "nav"
+    assert render(templates) == "nav"
+    assert len(rendered) == 1
+
+    # Changes to variables or referenced templates render it again
+    assert render(templates, variables_hash="b") == "nav"
+    assert len(rendered) == 2
+    assert render({**templates, "nav.html": '{{ render("new") }}'}) == "new"
+    assert len(rendered) == 3
+
+
+def test_fragment_cache_persist_references(tmp_path):
+    rendered = []
+
+    def render(templates):
+        env = get_environment(templates, tmp_path)
+        env.globals["render"] = lambda x: rendered.append(x) or x
+        return env.get_template("page.html").render()
+
+    # Missing templates are part of the hash until they exist
+    templates = {
+        "page.html": '{% cache "nav", persist=true %}'
+        '{% include "maybe.html" ignore missing %}{{ render("nav") }}{% endcache %}'
+    }
+    assert render(templates) == "nav"
+    assert render(templates) == "nav"
+    assert len(rendered) == 1
+    assert render({**templates, "maybe.html": "Maybe "}) == "Maybe nav"
+    assert len(rendered) == 2
+
+    # Includes of a variable are never persisted
+    templates = {
+        "page.html": '{% set name = "nav.html" %}'
+        '{% cache "nav", persist=true %}{% include name %}{% endcache %}',
+        "nav.html": '{{ render("dynamic") }}',
+    }
+    assert render(templates) == "dynamic"
+    assert render(templates) == "dynamic"
+    assert rendered[2:] == ["dynamic", "dynamic"]
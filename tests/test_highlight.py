@@ -0,0 +1,69 @@
+import markdown as python_markdown
+from markdown.extensions import codehilite, fenced_code
+
+from combine.cache import RenderCache
+from combine.jinja import highlight, markdown
+
+
+def test_code_highlight_cache(tmp_path, monkeypatch):
+    guessed = []
+    original_guess_lexer = highlight.guess_lexer
+
+    def guess_lexer(code, *args, **kwargs):
+        guessed.append(code)
+        return original_guess_lexer(code, *args, **kwargs)
+
+    monkeypatch.setattr(highlight, "guess_lexer", guess_lexer)
+
+    code = "def main():\n    print('hi')\n"
+
+    html = highlight.highlight_code(code, "", cache=RenderCache(str(tmp_path)))
+    assert highlight.highlight_code(code, "", cache=RenderCache(str(tmp_path))) == html
+    assert len(guessed) == 1
+
+    assert highlight.highlight_code(code, "python") != html
+    assert highlight.get_lexer("python") is highlight.get_lexer("python")
+
+
+def test_markdown_highlight_cache(tmp_path, monkeypatch):
+    highlighted = []
+    original_hilite = highlight.CodeHilite.hilite
+
+    def hilite(self, *args, **kwargs):
+        highlighted.append(self.src)
+        return original_hilite(self, *args, **kwargs)
+
+    monkeypatch.setattr(highlight.CodeHilite, "hilite", hilite)
+
+    cache = RenderCache(str(tmp_path))
+    block = "```python\nprint('hi')\n```\n"
+
+    first = markdown.markdown_to_html("# One\n\n" + block, cache=cache)
+    second = markdown.markdown_to_html("# Two\n\n" + block, cache=cache)
+    assert len(highlighted) == 1
+    assert first.split("\n", 1)[1] == second.split("\n", 1)[1]
+
+    # Indented code blocks go through codehilite itself
+    markdown.markdown_to_html(
+        "# Three\n\n    :::python\n    print('hi')\n", cache=cache
+    )
+    assert len(highlighted) == 2
+
+    # Without a cache everything is highlighted as usual
+    assert markdown.markdown_to_html("# One\n\n" + block) == first
+    assert len(highlighted) == 3
+
+
+def test_markdown_highlight_cache_is_contained(tmp_path):
+    # Python-Markdown itself isn't changed for anyone else using it
+    assert codehilite.CodeHilite is highlight.CodeHilite
+    assert fenced_code.CodeHilite is highlight.CodeHilite
+
+    cache = RenderCache(str(tmp_path))
+    block = "```python\nprint('hi')\n```\n"
+    with highlight.markdown_highlight_cache(cache):
+        python_markdown.markdown(block, extensions=["fenced_code", "codehilite"])
+    assert not (tmp_path / "highlight").exists()
+
+    markdown.markdown_to_html(block, cache=cache)
+    assert (tmp_path / "highlight").exists()
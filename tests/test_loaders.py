@@ -0,0 +1,33 @@
+import os
+
+from combine import Combine
+
+
+def test_content_loader_overlay_and_invalidation(site_dir):
+    # Override one of the built-in templates
+    (site_dir / "content" / "redirect.template.html").write_text("Custom redirect")
+
+    combine = Combine(config_path="combine.yml")
+    loader = combine.content_loader
+    env = combine.jinja_environment
+
+    assert loader.get_path("redirect.template.html") == str(
+        site_dir / "content" / "redirect.template.html"
+    )
+    assert loader.get_path("error.template.html").endswith(
+        os.path.join("base_content", "error.template.html")
+    )
+    assert loader.get_path("missing.html") is None
+    assert loader.get_path("../combine.yml") is None
+
+    pricing = site_dir / "content" / "pricing.html"
+    assert "Pricing" in env.get_template("pricing.html").render()
+
+    # Sources stay in memory until the file is refreshed
+    pricing.write_text(
+        '{% extends "base.template.html" %}{% block content %}Plans{% endblock %}'
+    )
+    assert "Pricing" in env.get_template("pricing.html").render()
+
+    combine.refresh_path(str(pricing))
+    assert "Plans" in env.get_template("pricing.html").render()
@@ -0,0 +1,110 @@
+import os
+from collections import OrderedDict
+
+import frontmatter
+
+from combine import Combine
+from combine.cache import RenderCache
+from combine.files import markdown
+from combine.jinja import markdown as jinja_markdown
+
+
+def test_frontmatter_parsed_once(site_dir, monkeypatch):
+    loaded = []
+    original_load = frontmatter.load
+
+    def load(path, *args, **kwargs):
+        loaded.append(path)
+        return original_load(path, *args, **kwargs)
+
+    monkeypatch.setattr(markdown.frontmatter, "load", load)
+    monkeypatch.setattr(markdown, "_frontmatter_cache", OrderedDict())
+
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+    combine.reload()
+    combine.build(only_paths=[str(site_dir / "content" / "markdown.md")], check=False)
+
+    assert loaded == [str(site_dir / "content" / "markdown.md")]
+
+    # Changes are picked up
+    (site_dir / "content" / "markdown.md").write_text("---\ntitle: New\n---\n# Changed")
+    combine.reload()
+    combine.build(check=False)
+
+    assert len(loaded) == 2
+    assert "Changed" in (site_dir / "output" / "markdown" / "index.html").read_text()
+
+
+def test_frontmatter_cache_is_bounded(site_dir, monkeypatch):
+    paths = []
+    for name in ("a", "b", "c"):
+        path = site_dir / "content" / f"{name}.md"
+        path.write_text(f"---\ntitle: {name}\n---\n# {name}")
+        paths.append(str(path))
+
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+
+    monkeypatch.setattr(markdown, "_frontmatter_cache", OrderedDict())
+    monkeypatch.setattr(markdown, "MAX_FRONTMATTER_CACHE_ITEMS", 2)
+
+    markdown.load_frontmatter(paths[0])
+    markdown.load_frontmatter(paths[1])
+    markdown.load_frontmatter(paths[0])
+    markdown.load_frontmatter(paths[2])
+
+    # The least recently used is dropped
+    assert list(markdown._frontmatter_cache) == [paths[0], paths[2]]
+
+    # Deleted files are forgotten
+    os.remove(paths[2])
+    combine.remove_path(paths[2])
+    assert list(markdown._frontmatter_cache) == [paths[0]]
+
+
+def test_markdown_render_cache(tmp_path, monkeypatch):
+    converted = []
+    original_convert = jinja_markdown.markdown.Markdown.convert
+
+    def convert(self, source):
+        converted.append(source)
+        return original_convert(self, source)
+
+    monkeypatch.setattr(jinja_markdown.markdown.Markdown, "convert", convert)
+
+    cache = RenderCache(str(tmp_path))
+    content = "# Title\n\n```python\nprint('hi')\n```\n"
+
+    html = jinja_markdown.markdown_to_html(content, cache=cache)
+    assert jinja_markdown.markdown_to_html(content, cache=cache) == html
+    assert len(converted) == 1
+
+    # The disk cache is shared with the next build
+    assert (
+        jinja_markdown.markdown_to_html(content, cache=RenderCache(str(tmp_path)))
+        == html
+    )
+    assert len(converted) == 1
+
+    # The reused converter doesn't leak state between documents
+    assert jinja_markdown.markdown_to_html(content) == html
+    assert jinja_markdown.markdown_to_html("# Other") == '<h1 id="other">Other</h1>'
+    assert len(converted) == 3
+
+
+def test_render_cache_prune(tmp_path):
+    cache = RenderCache(str(tmp_path), max_size=10)
+    cache.set("markdown", "a" * 64, "12345")
+    cache.set("markdown", "b" * 64, "12345")
+    cache.set("markdown", "c" * 64, "12345")
+
+    paths = [cache._get_path("markdown", x * 64) for x in "abc"]
+    for i, path in enumerate(paths):
+        os.utime(path, (i, i))
+
+    # Reading a value counts as using it
+    assert RenderCache(str(tmp_path)).get("markdown", "a" * 64) == "12345"
+
+    cache.prune()
+    assert [os.path.exists(x) for x in paths] == [True, False, True]
@@ -0,0 +1,397 @@
+import os
+import subprocess
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from watchfiles import Change
+
+from combine import Combine
+from combine.config import BuildStep, StepWatchMatcher
+from combine.dev import Watcher, WatchFilter, get_watch_pattern_root
+from combine.exceptions import BuildCancelled, BuildError
+
+
+def test_watcher_added_file_without_reload(site_dir, monkeypatch):
+    team = site_dir / "content" / "team.html"
+    team.write_text(
+        '{% extends "base.template.html" %}'
+        '{% block content %}{% include "_people.html" %}{% endblock %}'
+    )
+
+    combine = Combine(config_path="combine.yml")
+    with pytest.raises(BuildError):
+        combine.build()
+    watcher = Watcher(".", combine=combine)
+
+    def reload():
+        raise AssertionError("Reloaded everything")
+
+    monkeypatch.setattr(combine, "reload", reload)
+
+    about = site_dir / "content" / "about.html"
+    about.write_text(
+        '{% extends "base.template.html" %}{% block content %}About{% endblock %}'
+    )
+    result = watcher.process_change(Change.added, str(about))
+    assert result.rebuild_paths == [str(about)]
+    combine.build(result.rebuild_paths)
+    assert "About" in (site_dir / "output" / "about" / "index.html").read_text()
+
+    # Files that referenced it before it existed are rebuilt too
+    people = site_dir / "content" / "_people.html"
+    people.write_text("The team")
+    result = watcher.process_change(Change.added, str(people))
+    assert sorted(result.rebuild_paths) == sorted([str(people), str(team)])
+    combine.build(result.rebuild_paths)
+    assert "The team" in (site_dir / "output" / "team" / "index.html").read_text()
+
+    # A directory of new files
+    (site_dir / "content" / "blog").mkdir()
+    (site_dir / "content" / "blog" / "first.html").write_text("First")
+    (site_dir / "content" / "blog" / "second.html").write_text("Second")
+    result = watcher.process_change(Change.added, str(site_dir / "content" / "blog"))
+    assert sorted(result.rebuild_paths) == [
+        str(site_dir / "content" / "blog" / "first.html"),
+        str(site_dir / "content" / "blog" / "second.html"),
+    ]
+
+
+def test_add_path_replaces_lower_priority_template(site_dir):
+    combine = Combine(config_path="combine.yml")
+    env = combine.jinja_environment
+    assert "Custom" not in env.get_template("redirect.template.html").render(
+        redirect_url="/"
+    )
+
+    custom = site_dir / "content" / "redirect.template.html"
+    custom.write_text("Custom redirect")
+    combine.add_path(str(custom))
+
+    assert env.get_template("redirect.template.html").render() == "Custom redirect"
+
+
+def test_build_cancelled_between_files(site_dir, monkeypatch):
+    combine = Combine(config_path="combine.yml")
+    cancel = threading.Event()
+    rendered = []
+    original_render_file = combine.render_file
+
+    def render_file(file):
+        original_render_file(file)
+        rendered.append(file.path)
+        cancel.set()
+
+    monkeypatch.setattr(combine, "render_file", render_file)
+
+    with pytest.raises(BuildCancelled):
+        combine.build(cancel=cancel)
+
+    assert len(rendered) == 1
+    # Nothing half-written (or temporary) is left behind
+    for root, _, filenames in os.walk(site_dir / "output"):
+        assert not [x for x in filenames if x.endswith(".tmp")]
+
+
+def test_watcher_restarts_cancelled_build(site_dir, monkeypatch):
+    combine = Combine(config_path="combine.yml")
+    combine.build()
+    watcher = Watcher(".", combine=combine)
+
+    index = str(site_dir / "content" / "index.html")
+    pricing = str(site_dir / "content" / "pricing.html")
+    markdown = site_dir / "content" / "markdown.md"
+
+    started = threading.Event()
+    builds = []
+    original_build = combine.build
+
+    def build(only_paths=[], cancel=None, **kwargs):
+        builds.append(only_paths)
+        if len(builds) == 1:
+            # Still working on the first file when the next change comes in
+            started.set()
+            assert cancel.wait(timeout=5)
+        original_build(only_paths, cancel=cancel, **kwargs)
+
+    monkeypatch.setattr(combine, "build", build)
+
+    watcher.start_build([index, pricing])
+    assert started.wait(timeout=5)
+
+    markdown.write_text(markdown.read_text() + "\nMore")
+    watcher.process_changes({(Change.modified, str(markdown))})
+    watcher._build_thread.join(timeout=5)
+
+    assert builds == [[index, pricing], sorted([index, str(markdown), pricing])]
+    assert watcher.cancel_build() is None
+    assert "More" in (site_dir / "output" / "markdown" / "index.html").read_text()
+
+
+def test_watch_paths_and_filter(site_dir, monkeypatch):
+    (site_dir / "assets").mkdir()
+    (site_dir / "tailwind.config.js").write_text("")
+    (site_dir / "combine.yml").write_text(
+        (site_dir / "combine.yml").read_text()
+        + """
+steps:
+- run: "echo css"
+  watch:
+  - "./assets/*.css"
+  - "tailwind.config.js"
+- run: "echo missing"
+  watch:
+  - "./missing/**/*.js"
+"""
+    )
+
+    (site_dir / "node_modules").mkdir()
+
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+    watcher = Watcher(".", combine=combine)
+
+    # Not the output, node_modules, or anything else in the project
+    assert watcher.get_watch_paths() == [
+        str(site_dir / "assets"),
+        str(site_dir / "content"),
+        str(site_dir / "combine.yml"),
+        str(site_dir / "tailwind.config.js"),
+    ]
+    # A pattern that could match anywhere means watching the whole project
+    assert get_watch_pattern_root("*.css") == str(site_dir)
+
+    watch_filter = WatchFilter(watcher)
+    assert watch_filter(Change.modified, str(site_dir / "content" / "index.html"))
+    assert watch_filter(Change.modified, str(site_dir / "combine.yml"))
+    assert watch_filter(Change.modified, str(site_dir / "assets" / "site.css"))
+    assert watch_filter(Change.added, str(site_dir / "tailwind.config.js"))
+    assert not watch_filter(Change.modified, str(site_dir / "assets" / "site.js"))
+    assert not watch_filter(Change.modified, str(site_dir / "README.md"))
+    assert not watch_filter(Change.modified, str(site_dir / "output" / "index.html"))
+    assert not watch_filter(Change.modified, str(site_dir / "output" / "site.css"))
+    assert not watch_filter(
+        Change.added, str(site_dir / "content" / "node_modules" / "x.html")
+    )
+    assert not watch_filter(
+        Change.added, str(site_dir / "content" / "download.html.crdownload")
+    )
+
+    # Files watched on their own are watched again after they change
+    # (since editors can replace them)
+    monkeypatch.setattr(watcher.step_runner, "run", lambda *args: None)
+    watcher.process_changes({(Change.deleted, str(site_dir / "tailwind.config.js"))})
+    assert watcher._rewatch
+
+    # Steps can write assets to the output for repaint to reload
+    watcher = Watcher(".", combine=combine, repaint=object())
+    assert str(site_dir / "output") in watcher.get_watch_paths()
+    watch_filter = WatchFilter(watcher)
+    assert watch_filter(Change.modified, str(site_dir / "output" / "site.css"))
+    assert not watch_filter(Change.modified, str(site_dir / "output" / "index.html"))
+
+
+def test_step_watch_matcher(site_dir):
+    css = BuildStep(run="echo css", watch=["./assets/*.css", "*.config.js"])
+    js = BuildStep(run="echo js", watch=["assets/**/*.js", "*.config.js"])
+    matcher = StepWatchMatcher([css, js, BuildStep(run="echo", watch="npm start")])
+
+    assert matcher.match("assets/site.css") == [(css, "./assets/*.css")]
+    assert matcher.match(str(site_dir / "assets" / "lib" / "app.js")) == [
+        (js, "assets/**/*.js")
+    ]
+    assert matcher.match("tailwind.config.js") == [
+        (css, "*.config.js"),
+        (js, "*.config.js"),
+    ]
+    assert matcher.match("content/index.html") == []
+
+    # Patterns outside of the project are normalized like the paths
+    shared = BuildStep(run="echo shared", watch=["../shared/*.css"])
+    assert StepWatchMatcher([shared]).match("../shared/site.css") == [
+        (shared, "../shared/*.css")
+    ]
+    assert css.watch_pattern_match("assets/site.css") == "./assets/*.css"
+    assert StepWatchMatcher([]).match("assets/site.css") == []
+
+
+def test_watcher_runs_matched_steps_once_in_background(site_dir, monkeypatch):
+    (site_dir / "combine.yml").write_text(
+        (site_dir / "combine.yml").read_text()
+        + """
+steps:
+- run: "echo css"
+  watch:
+  - "./assets/*.css"
+- run: "echo js"
+  watch:
+  - "./assets/*.js"
+"""
+    )
+    combine = Combine(config_path="combine.yml")
+    watcher = Watcher(".", combine=combine)
+
+    release = threading.Event()
+    runs = []
+
+    def run_process(step, check=True):
+        runs.append(step.run)
+        # The watcher keeps going while steps run
+        assert release.wait(timeout=5)
+        return subprocess.CompletedProcess(step.run, 0)
+
+    monkeypatch.setattr(BuildStep, "run_process", run_process)
+
+    assets = site_dir / "assets"
+    watcher.process_changes(
+        {
+            (Change.modified, str(assets / "a.css")),
+            (Change.modified, str(assets / "b.css")),
+            (Change.added, str(assets / "c.css")),
+            (Change.modified, str(assets / "app.js")),
+        }
+    )
+    wait_for(lambda: len(runs) == 2)
+    assert sorted(runs) == ["echo css", "echo js"]
+
+    # Changes while the step is running are picked up by one more run
+    watcher.process_changes({(Change.modified, str(assets / "a.css"))})
+    watcher.process_changes({(Change.modified, str(assets / "b.css"))})
+    time.sleep(0.1)
+    assert sorted(runs) == ["echo css", "echo js"]
+
+    release.set()
+    watcher.step_runner.wait()
+    assert sorted(runs) == ["echo css", "echo css", "echo js"]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def test_watcher_deleted_file_without_reload(site_dir, monkeypatch):
+    team = site_dir / "content" / "team.html"
+    team.write_text(
+        '{% extends "base.template.html" %}'
+        '{% block content %}{% include "_people.html" %}{% endblock %}'
+    )
+    people = site_dir / "content" / "_people.html"
+    people.write_text("The team")
+
+    combine = Combine(config_path="combine.yml")
+    combine.build()
+    watcher = Watcher(".", combine=combine)
+
+    def reload():
+        raise AssertionError("Reloaded everything")
+
+    def clean():
+        raise AssertionError("Cleaned the output")
+
+    monkeypatch.setattr(combine, "reload", reload)
+    monkeypatch.setattr(combine, "clean", clean)
+
+    # Only the output of a page that nothing uses is removed
+    pricing = site_dir / "content" / "pricing.html"
+    pricing.unlink()
+    assert watcher.process_change(Change.deleted, str(pricing)) is None
+    assert not (site_dir / "output" / "pricing").exists()
+    assert (site_dir / "output" / "index.html").exists()
+    assert "pricing/index.html" not in combine.manifest.entries
+
+    # The pages that included a deleted template are rebuilt
+    people.unlink()
+    result = watcher.process_change(Change.deleted, str(people))
+    assert result.rebuild_paths == [str(team)]
+    with pytest.raises(BuildError):
+        combine.build(result.rebuild_paths)
+
+
+def test_watcher_replaced_file_is_modified(site_dir, monkeypatch):
+    combine = Combine(config_path="combine.yml")
+    combine.build()
+    watcher = Watcher(".", combine=combine)
+
+    builds = []
+    monkeypatch.setattr(watcher, "start_build", builds.append)
+
+    # Saved by writing a new file and renaming it over the old one
+    pricing = site_dir / "content" / "pricing.html"
+    replacement = site_dir / "content" / "pricing.html.new"
+    replacement.write_text(pricing.read_text() + "Replaced")
+    os.replace(replacement, pricing)
+
+    watcher.process_changes(
+        {(Change.deleted, str(pricing)), (Change.added, str(pricing))}
+    )
+    assert builds == [[str(pricing)]]
+    assert (site_dir / "output" / "pricing" / "index.html").exists()
+
+    # Deleted again (after being added) in the same batch
+    pricing.unlink()
+    watcher.process_changes(
+        {(Change.added, str(pricing)), (Change.deleted, str(pricing))}
+    )
+    assert builds == [[str(pricing)]]
+    assert not (site_dir / "output" / "pricing").exists()
+
+
+def test_watcher_output_changes_dont_cancel_build(site_dir, monkeypatch):
+    combine = Combine(config_path="combine.yml")
+    combine.build()
+    watcher = Watcher(".", combine=combine)
+
+    cancelled = []
+    monkeypatch.setattr(watcher, "cancel_build", lambda: cancelled.append(True))
+
+    # Like a content .js file being copied to the output by the current build
+    app_js = site_dir / "output" / "app.js"
+    app_js.write_text("console.log('app')")
+    watcher.process_changes({(Change.added, str(app_js))})
+    assert cancelled == []
+
+    markdown = site_dir / "content" / "markdown.md"
+    markdown.write_text(markdown.read_text() + "\nMore")
+    builds = []
+    monkeypatch.setattr(watcher, "start_build", builds.append)
+    watcher.process_changes({(Change.modified, str(markdown))})
+    assert cancelled == [True]
+    assert builds == [[str(markdown)]]
+
+
+def test_watcher_step_writing_to_output_runs_once(site_dir, monkeypatch):
+    (site_dir / "combine.yml").write_text(
+        (site_dir / "combine.yml").read_text()
+        + """
+steps:
+- run: "echo css"
+  watch:
+  - "*.css"
+"""
+    )
+    combine = Combine(config_path="combine.yml")
+    combine.build(check=False)
+    watcher = Watcher(".", combine=combine, repaint=Mock())
+
+    runs = []
+
+    def run_process(step, check=True):
+        runs.append(step.run)
+        # Like a CSS build writing straight to the output
+        (site_dir / "output" / "site.css").write_text("body {}")
+        return subprocess.CompletedProcess(step.run, 0)
+
+    monkeypatch.setattr(BuildStep, "run_process", run_process)
+
+    watcher.process_changes({(Change.modified, str(site_dir / "assets" / "a.css"))})
+    watcher.step_runner.wait()
+
+    # The step's own output is repainted, but doesn't run the step again
+    watcher.process_changes({(Change.modified, str(site_dir / "output" / "site.css"))})
+    watcher.step_runner.wait()
+    assert runs == ["echo css"]
+    watcher.repaint.reload_assets.assert_called_once_with(["site.css"])